@@ -1,14 +1,23 @@
 #!/usr/bin/env python3
 import numpy as np
-import pyaudio
 import threading
-import queue
-from typing import Literal, Optional
+import time
+from typing import Dict, List, Literal, Optional, Tuple
 import ChatTTS
 from ChatTTS.utils.io import FileLike
 import torch
 from .general import AudioGenType
-from lipsync import LipSyncInterface
+from .playback import PlaybackEngine, Utterance
+from .sinks import WavFileSink, create_audio_sink
+from .textSplit import split_sentences
+from .ttsCache import TTSCache
+from .voiceRegistry import VoiceRegistry
+from lipsync import LIP_SYNC_RATE, VISEME_PARAMS, LipSyncInterface, VisemeAnalyzer
+
+# 口型帧的帧长（采样点），24 kHz 下对应显示帧率
+ENVELOPE_HOP = 24000 // LIP_SYNC_RATE
+# 整段音频（缓存 / 批量合成）送入播放队列时的块长，为包络帧长的整数倍
+PLAYBACK_CHUNK = ENVELOPE_HOP * 5
 
 @AudioGenType("ChatTTS")
 class ChatTTS_VoiceGen:
@@ -28,6 +37,17 @@ class ChatTTS_VoiceGen:
                  use_flash_attn: bool = False,
                  use_vllm: bool = False,
                  experimental: bool = False,
+                 pipeline: bool = False,
+                 lookahead: int = 2,
+                 refine_prompt: str = "[oral_2][laugh_0][break_6]",
+                 cache: bool = True,
+                 cache_dir: str = "./tts_cache",
+                 cache_memory_mb: int = 64,
+                 cache_disk_mb: int = 512,
+                 voice: Optional[str] = None,
+                 voice_dir: str = "./voices",
+                 sink: str = "pyaudio",
+                 sink_path: Optional[str] = None,
                  **kwargs):
         
         self.chat = ChatTTS.Chat()
@@ -37,20 +57,129 @@ class ChatTTS_VoiceGen:
         self.top_P = top_P
         self.top_K = top_K
         self.audio_seed = audio_seed
+        self.pipeline = pipeline  # 是否启用分句流水线合成
+        self.lookahead = max(1, lookahead)  # 流水线最多领先播放的句数
+        self.refine_prompt = refine_prompt
+        self.viseme_analyzer = VisemeAnalyzer(24000, ENVELOPE_HOP)
 
-    def speak(self, text: str):
-        """生成并播放语音，同时计算实时RMS值"""
-        # 创建音频队列
-        audio_queue = queue.Queue()
-        
-        # 启动播放线程
-        playback_thread = threading.Thread(target=self._audio_playback_thread, args=(audio_queue,))
-        playback_thread.daemon = True
-        playback_thread.start()
+        # 音色注册表：每个音色只采样一次说话人嵌入并持久化，保证跨运行音色一致
+        self.voice_registry = VoiceRegistry(voice_dir)
+        self.set_voice(voice or f"seed_{audio_seed}")
+
+        # 语音缓存：重复的句子直接播放缓存音频
+        self.cache = TTSCache(cache_dir, cache_memory_mb << 20, cache_disk_mb << 20) if cache else None
+
+        # 常驻播放引擎，所有语音共用同一个音频输出（声卡 / WAV 文件 / 内存 / 空输出）
+        audio_sink = create_audio_sink(sink, sink_path, sample_rate=24000, frames_per_buffer=2048)
+        self.playback = PlaybackEngine(sample_rate=24000, frames_per_buffer=2048, sink=audio_sink,
+                                       envelope_callback=self._on_envelope_played if lip_sync_interface else None)
+        self.playback.start()
+        self.current_utterance: Optional[Utterance] = None
+
+    def close(self):
+        """取消当前语音并关闭播放引擎"""
+        self.cancel()
+        self.playback.close()
+
+    def _sample_speaker(self) -> str:
+        """以 audio_seed 为种子采样说话人嵌入，不影响全局随机状态"""
+        with torch.random.fork_rng():
+            torch.manual_seed(self.audio_seed)
+            return self.chat.sample_random_speaker()
+
+    def set_voice(self, name: str):
+        """切换到指定名称的音色，未注册时按当前 audio_seed 采样并保存"""
+        self.voice_name = name
+        self.speaker_embedding = self.voice_registry.get_or_create(name, self._sample_speaker)
+        print(f"[ChatTTS] 使用音色: {name}")
+
+    def speak(self, text: str, block: bool = True) -> Utterance:
+        """生成并播放语音，同时计算实时RMS值；block=False 时生成完毕即返回，后续语音在同一输出流中无缝排队。
+        返回的句柄可用于 cancel() / wait() / is_playing()"""
+        utterance = self.playback.begin()
+        utterance.cancel_callbacks.append(self._reset_lip_sync)
+        self.current_utterance = utterance
+
+        # 分句流水线：合成第 N+1 句的同时播放第 N 句
+        sentences = split_sentences(text) if self.pipeline else [text]
+        if len(sentences) > 1:
+            self._speak_pipelined(utterance, sentences)
+        else:
+            self._play_stream(utterance, self._synthesize_stream(text))
         
-        # 生成参数
+        # 发送结束信号
+        self.playback.end(utterance)
+        if utterance.real_time_factor is not None:
+            print(f"[ChatTTS] 合成实时率 RTF={utterance.real_time_factor:.2f} "
+                  f"(合成 {utterance.synthesis_time:.2f} s / 音频 {utterance.synthesized_samples / 24000:.2f} s)")
+        if block:
+            utterance.wait()
+            print("[ChatTTS] 语音已取消" if utterance.cancelled.is_set() else "[ChatTTS] 音频播放结束")
+        return utterance
+
+    def cancel(self):
+        """打断当前正在合成或播放的语音"""
+        utterance = self.current_utterance
+        if utterance is not None and utterance.is_playing():
+            utterance.cancel()
+
+    def _reset_lip_sync(self):
+        """取消播放后立即闭嘴"""
+        if self.lip_sync_interface:
+            self.lip_sync_interface.clear()
+
+    def _on_envelope_played(self, start_time: float, envelope: np.ndarray):
+        """音频块开始播放时，将其口型包络按播放时刻交给口型同步接口"""
+        self.lip_sync_interface.put_envelope(start_time, envelope, 24000 / ENVELOPE_HOP)
+
+    def _cache_key(self, text: str) -> str:
+        return TTSCache.make_key(
+            text=text,
+            speaker=self.speaker_embedding,
+            audio_seed=self.audio_seed,
+            temperature=self.temperature,
+            top_P=self.top_P,
+            top_K=self.top_K,
+            refine_prompt=self.refine_prompt,
+            envelope_hop=ENVELOPE_HOP,
+            envelope="viseme",
+        )
+
+    def _cache_get(self, key: str):
+        """查询缓存，命中时返回 (音频, 口型帧)"""
+        cached = self.cache.get(key) if self.cache else None
+        if cached is None:
+            return None
+        audio, envelope = cached
+        return audio, envelope.reshape(-1, VISEME_PARAMS)
+
+    def _synthesize_stream(self, text: str):
+        """流式合成语音，逐块产出 (float32 音频, 口型包络)；缓存命中时直接产出缓存音频与包络，否则包络为 None"""
+        key = self._cache_key(text) if self.cache else None
+        if key is not None:
+            cached = self._cache_get(key)
+            if cached is not None:
+                yield from self._iter_chunks(*cached)
+                return
+
+        # 被取消时本生成器在 yield 处关闭，同时关闭推理流；不完整的音频不会写入缓存
+        chunks = []
+        stream = self._infer_stream(text)
+        try:
+            for data in stream:
+                chunks.append(data)
+                yield data, None
+        finally:
+            stream.close()
+
+        if key is not None and chunks:
+            audio = np.concatenate(chunks)
+            self.cache.put(key, audio, self.viseme_analyzer.analyze(audio)) # type: ignore
+
+    def _infer_params(self):
+        """生成推理参数"""
         params_infer_code = ChatTTS.Chat.InferCodeParams(
-            spk_emb=text,
+            spk_emb=self.speaker_embedding,
             temperature=self.temperature,
             top_P=self.top_P,
             top_K=self.top_K,
@@ -58,8 +187,13 @@ class ChatTTS_VoiceGen:
         )
         
         params_refine_text = ChatTTS.Chat.RefineTextParams(
-            prompt="[oral_2][laugh_0][break_6]"
+            prompt=self.refine_prompt
         )
+        return params_infer_code, params_refine_text
+
+    def _infer_stream(self, text: str):
+        """调用 ChatTTS 流式推理，逐块产出 float32 音频"""
+        params_infer_code, params_refine_text = self._infer_params()
         
         # 生成音频流
         print("[ChatTTS] 开始生成音频...")
@@ -71,50 +205,155 @@ class ChatTTS_VoiceGen:
         )
         
         # 处理音频流
-        for chunk in generator:
-            if isinstance(chunk, tuple) and len(chunk) >= 2:
-                status, data = chunk[:2]
-                
-                if status == 'wav' and isinstance(data, np.ndarray):
-                    # 确保数据类型正确
-                    if data.dtype != np.float32:
-                        data = data.astype(np.float32)
+        try:
+            for chunk in generator:
+                if isinstance(chunk, tuple) and len(chunk) >= 2:
+                    status, data = chunk[:2]
                     
-                    # 计算RMS值并发送到口型同步接口
-                    if self.lip_sync_interface:
-                        rms = self._calculate_rms(data)
-                        self.lip_sync_interface.put_rms(rms)
-                    
-                    # 添加到音频队列
-                    audio_queue.put(data)
-        
-        # 发送结束信号
-        audio_queue.put(None)
-        playback_thread.join()
-        print("[ChatTTS] 音频播放结束")
-    
-    def _audio_playback_thread(self, audio_queue: queue.Queue):
-        """音频播放线程"""
-        p = pyaudio.PyAudio()
-        stream = p.open(
-            format=pyaudio.paFloat32,
-            channels=1,
-            rate=24000,
-            output=True,
-            frames_per_buffer=2048
-        )
-        
-        while True:
-            audio_chunk = audio_queue.get()
-            if audio_chunk is None:  # 结束信号
-                break
-            stream.write(audio_chunk.tobytes())
+                    if status == 'wav' and isinstance(data, np.ndarray):
+                        # 确保数据类型正确
+                        if data.dtype != np.float32:
+                            data = data.astype(np.float32)
+                        yield data
+        finally:
+            # 提前关闭时停止模型继续生成
+            if hasattr(generator, "close"):
+                generator.close() # type: ignore
+
+    @staticmethod
+    def _iter_chunks(audio: np.ndarray, envelope: np.ndarray):
+        """将整段音频按播放块长切块，逐块产出 (音频, 对应的口型包络)"""
+        frames = PLAYBACK_CHUNK // ENVELOPE_HOP
+        for i in range(0, len(envelope), frames):
+            yield audio[i * ENVELOPE_HOP:(i + frames) * ENVELOPE_HOP], envelope[i:i + frames]
+
+    def synthesize_batch(self, texts: List[str]) -> List[np.ndarray]:
+        """批量合成多段文本（一次推理调用分摊模型开销），返回各自的 float32 音频"""
+        return [audio for audio, _ in self._synthesize_batch(texts)]
+
+    def _synthesize_batch(self, texts: List[str]) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """批量合成，返回 (音频, 口型包络) 列表；已缓存的文本不再推理"""
+        results: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        missing: List[str] = []
+        for text in dict.fromkeys(texts):
+            cached = self._cache_get(self._cache_key(text)) if self.cache else None
+            if cached is not None:
+                results[text] = cached
+            else:
+                missing.append(text)
+
+        if missing:
+            params_infer_code, params_refine_text = self._infer_params()
+            print(f"[ChatTTS] 批量生成 {len(missing)} 段音频...")
+            wavs = self.chat.infer(
+                missing,
+                stream=False,
+                params_infer_code=params_infer_code,
+                params_refine_text=params_refine_text
+            )
+            for text, wav in zip(missing, wavs): # type: ignore
+                audio = np.asarray(wav, dtype=np.float32).reshape(-1)
+                envelope = self.viseme_analyzer.analyze(audio)
+                results[text] = (audio, envelope)
+                if self.cache:
+                    self.cache.put(self._cache_key(text), audio, envelope)
+
+        return [results[text] for text in texts]
+
+    def prewarm(self, texts: List[str], batch_size: int = 8):
+        """预先批量合成并缓存常用语句"""
+        for i in range(0, len(texts), batch_size):
+            self._synthesize_batch(texts[i:i + batch_size])
+
+    def render(self, texts: List[str], path: str):
+        """离线渲染：批量合成多段文本并依次写入 WAV 文件，不经过播放引擎"""
+        sink = WavFileSink(path, sample_rate=24000)
+        sink.open()
+        try:
+            for audio in self.synthesize_batch(texts):
+                sink.write(audio)
+        finally:
+            sink.close()
+
+    def _play_chunk(self, utterance: Utterance, data: np.ndarray, envelope: Optional[np.ndarray] = None):
+        """将音频块连同按显示帧率分帧的口型帧加入播放队列，口型帧在该块实际播放时才送到口型同步接口"""
+        if self.lip_sync_interface and envelope is None:
+            envelope = self.viseme_analyzer.analyze(data)
         
-        stream.stop_stream()
-        stream.close()
-        p.terminate()
-    
-    def _calculate_rms(self, audio_data: np.ndarray) -> float:
-        """计算音频片段的RMS值"""
-        # 使用均方根公式计算音量
-        return np.sqrt(np.mean(np.square(audio_data)))
+        # 添加到播放队列
+        self.playback.write(utterance, data, envelope if self.lip_sync_interface else None)
+
+    def _play_stream(self, utterance: Utterance, stream) -> bool:
+        """将 (音频, 口型包络) 流送入播放队列，语音被取消时关闭生成器并返回 False"""
+        try:
+            # 只累计从流中取数据的耗时，不计入等待播放队列的时间
+            t0 = time.perf_counter()
+            for data, envelope in stream:
+                utterance.synthesis_time += time.perf_counter() - t0
+                if utterance.cancelled.is_set():
+                    return False
+                self._play_chunk(utterance, data, envelope)
+                t0 = time.perf_counter()
+        finally:
+            stream.close()
+        return not utterance.cancelled.is_set()
+
+    def _speak_pipelined(self, utterance: Utterance, sentences: List[str]):
+        """分句流水线：逐句流式合成并送入播放队列，已合成但未播放完的句子最多 lookahead 句。
+        每句都流式合成，语音被取消时立即停止推理（批量合成仅用于 prewarm 与离线渲染）"""
+        in_flight = threading.Semaphore(self.lookahead)
+        for sentence in sentences:
+            in_flight.acquire()
+            if utterance.cancelled.is_set():
+                return
+            if not self._play_stream(utterance, self._synthesize_stream(sentence)):
+                return
+            # 该句播放完毕后才允许继续合成
+            self.playback.mark(utterance, in_flight.release)
+
+
+def benchmark(texts: Optional[List[str]] = None, repeats: int = 1):
+    """在 CPU 上对比批量合成与逐条合成的吞吐"""
+    texts = texts or [
+        "你好，我是虚拟助手，很高兴为你服务。",
+        "今天天气真不错，适合出去走走。",
+        "有什么我可以帮你的吗？",
+        "好的，我明白了。",
+        "请稍等，我查一下。",
+        "这个问题很有意思。",
+        "我们下次再聊吧。",
+        "谢谢你的耐心。",
+    ]
+    voice_gen = ChatTTS_VoiceGen(lip_sync_interface=None, cache=False, compile=False, device=torch.device("cpu"), sink="null") # type: ignore
+
+    def run(name, synthesize):
+        t0 = time.perf_counter()
+        audio_seconds = 0.0
+        for _ in range(repeats):
+            audio_seconds += sum(len(audio) for audio in synthesize()) / 24000
+        elapsed = time.perf_counter() - t0
+        n = len(texts) * repeats
+        print(f"[{name}] {n} texts in {elapsed:.2f}s: {n / elapsed:.2f} texts/s, {audio_seconds / elapsed:.2f} audio s/s")
+
+    run("sequential", lambda: [voice_gen.synthesize_batch([text])[0] for text in texts])
+    run("batch", lambda: voice_gen.synthesize_batch(texts))
+    voice_gen.close()
+
+
+if __name__ == "__main__":
+    # python -m audio.chatTTS                        批量 / 逐条合成吞吐对比
+    # python -m audio.chatTTS --render out.wav 文本...  离线渲染到 WAV 文件
+    import argparse
+
+    parser = argparse.ArgumentParser(description="ChatTTS voice generator")
+    parser.add_argument("--render", metavar="WAV", help="render the given texts to a WAV file instead of benchmarking")
+    parser.add_argument("--repeats", type=int, default=1, help="benchmark repetitions")
+    parser.add_argument("texts", nargs="*", help="texts to synthesize")
+    args = parser.parse_args()
+
+    if args.render:
+        voice_gen = ChatTTS_VoiceGen(lip_sync_interface=None, sink="null") # type: ignore
+        voice_gen.render(args.texts, args.render)
+        voice_gen.close()
+    else:
+        benchmark(args.texts or None, args.repeats)
@@ -1,15 +1,33 @@
 #!/usr/bin/env python3
-from typing import Dict, Type
+from typing import Any, Dict, List, Protocol, Type
+import numpy as np
 
 AudioGenerator_Dict: Dict[str, Type] = {}
 
+
+class VoiceGenerator(Protocol):
+    """语音生成器需要实现的接口"""
+
+    def speak(self, text: str, block: bool = True) -> Any:
+        """生成并播放语音，返回可取消的播放句柄"""
+        ...
+
+    def cancel(self) -> None:
+        """打断当前正在合成或播放的语音"""
+        ...
+
+    def synthesize_batch(self, texts: List[str]) -> List[np.ndarray]:
+        """批量合成多段文本，返回各自的 float32 音频（不播放）"""
+        ...
+
+
 def AudioGenType(keyword: str):
     def decorator(cls: Type) -> Type:
         AudioGenerator_Dict[keyword.lower()] = cls
         return cls
     return decorator
 
-def AudioGen(**kwargs) -> Type:
+def AudioGen(**kwargs) -> VoiceGenerator:
     type = kwargs.get("type", "").lower()
     if type not in AudioGenerator_Dict:
         raise ValueError(f"Unknown audio generator type: {type}")
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+import itertools
+import queue
+import threading
+import time
+from typing import Callable, List, Optional
+import numpy as np
+from .sinks import AudioSink, PyAudioSink
+
+
+class Utterance:
+    """一次语音播放的句柄，记录提交时间、首个样本写入设备的时间与合成耗时，可随时取消"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, engine: Optional["PlaybackEngine"] = None, sample_rate: int = 24000):
+        self.id = next(self._ids)
+        self.engine = engine
+        self.sample_rate = sample_rate
+        self.submit_time = time.perf_counter()
+        self.first_sample_time: Optional[float] = None
+        self.samples = 0  # 已写入输出的采样点数
+        self.synthesized_samples = 0  # 已提交到播放队列的采样点数
+        self.synthesis_time = 0.0  # 花在合成上的时间（秒），不含等待播放的时间
+        self.done = threading.Event()
+        self.cancelled = threading.Event()
+        self.cancel_callbacks: List[Callable[[], None]] = []
+
+    def cancel(self):
+        """取消该语音：停止后续合成，清空尚未播放的音频块"""
+        if self.cancelled.is_set() or self.done.is_set():
+            return
+        self.cancelled.set()
+        if self.engine is not None:
+            self.engine.flush(self)
+        for callback in self.cancel_callbacks:
+            callback()
+        self.done.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待播放结束或被取消，返回是否已结束"""
+        return self.done.wait(timeout)
+
+    def is_playing(self) -> bool:
+        """语音是否仍在合成或播放中"""
+        return not self.done.is_set()
+
+    @property
+    def time_to_first_sample(self) -> Optional[float]:
+        """从提交到首个样本写入输出流的时间（秒）"""
+        if self.first_sample_time is None:
+            return None
+        return self.first_sample_time - self.submit_time
+
+    @property
+    def real_time_factor(self) -> Optional[float]:
+        """合成实时率：合成耗时 / 合成出的音频时长，小于 1 表示合成快于实时"""
+        if self.synthesized_samples == 0:
+            return None
+        return self.synthesis_time / (self.synthesized_samples / self.sample_rate)
+
+
+class PlaybackEngine:
+    """常驻播放引擎：持久的音频输出 + 持续运行的送数线程，连续的语音无缝排队播放"""
+
+    def __init__(self, sample_rate: int = 24000, frames_per_buffer: int = 2048, sink: Optional[AudioSink] = None,
+                 envelope_callback: Optional[Callable[[float, np.ndarray], None]] = None):
+        self.sample_rate = sample_rate
+        self.frames_per_buffer = frames_per_buffer
+        self.sink = sink or PyAudioSink(sample_rate, frames_per_buffer)
+        # 音频块开始播放时调用 envelope_callback(开始播放时刻, 口型包络)，用于口型与声音对齐
+        self.envelope_callback = envelope_callback
+        self.play_cursor = 0.0  # 已写入输出的音频预计播放结束的时刻（time.perf_counter()）
+        self.queue: queue.Queue = queue.Queue()
+        self.thread = None
+        self.running = False
+        self.last_time_to_first_sample: Optional[float] = None
+
+    def start(self):
+        """打开音频输出并启动送数线程"""
+        if self.running:
+            return
+        self.sink.open()
+        self.running = True
+        self.thread = threading.Thread(target=self._feeder_thread)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def close(self):
+        """播放完已排队的音频后关闭音频输出"""
+        if not self.running:
+            return
+        self.queue.put(None)
+        if self.thread:
+            self.thread.join(timeout=5.0)
+        self.running = False
+        self.sink.close()
+
+    def begin(self) -> Utterance:
+        """开始一次新的语音播放"""
+        return Utterance(self, self.sample_rate)
+
+    def write(self, utterance: Utterance, audio_chunk: np.ndarray, envelope: Optional[np.ndarray] = None):
+        """将 float32 音频块（及其口型包络）加入播放队列"""
+        utterance.synthesized_samples += len(audio_chunk)
+        self.queue.put((utterance, audio_chunk, envelope))
+
+    def mark(self, utterance: Utterance, callback: Callable[[], None]):
+        """在播放队列中插入标记，播放到此处时调用 callback"""
+        self.queue.put((utterance, callback, None))
+
+    def end(self, utterance: Utterance):
+        """标记该语音的所有音频块已提交"""
+        self.queue.put((utterance, None, None))
+
+    def flush(self, utterance: Utterance):
+        """从播放队列中移除该语音尚未播放的音频块（保留标记与结束信号，保证等待方被唤醒）"""
+        with self.queue.mutex:
+            kept = [item for item in self.queue.queue
+                    if item is None or item[0] is not utterance or not isinstance(item[1], np.ndarray)]
+            self.queue.queue.clear()
+            self.queue.queue.extend(kept)
+
+    def _feeder_thread(self):
+        """送数线程：持续从队列取出音频块写入音频输出，队列为空时声卡输出流自动补静音"""
+        while True:
+            item = self.queue.get()
+            if item is None:  # 关闭信号
+                break
+            utterance, audio_chunk, envelope = item
+            if audio_chunk is None:  # 该语音结束
+                utterance.done.set()
+                continue
+            if callable(audio_chunk):  # 播放位置标记
+                audio_chunk()
+                continue
+            if utterance.cancelled.is_set():  # 取消后才提交的音频块直接丢弃
+                continue
+            if utterance.first_sample_time is None:
+                utterance.first_sample_time = time.perf_counter()
+                self.last_time_to_first_sample = utterance.time_to_first_sample
+                print(f"[Playback] 首个音频样本延迟: {self.last_time_to_first_sample * 1000:.0f} ms") # type: ignore
+            # 播放位置：输出缓冲区中已有音频之后，且不早于输出延迟之后
+            start_time = max(time.perf_counter() + self.sink.latency, self.play_cursor)
+            self.play_cursor = start_time + len(audio_chunk) / self.sample_rate
+            if envelope is not None and self.envelope_callback:
+                self.envelope_callback(start_time, envelope)
+            self.sink.write(audio_chunk)
+            utterance.samples += len(audio_chunk)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+import threading
+import time
+import wave
+from typing import List, Optional
+import numpy as np
+
+
+class AudioSink:
+    """音频输出基类：write() 接收 float32 单声道音频块"""
+
+    # 实时输出（声卡、按时钟消耗的空输出）按采样率消耗数据；非实时输出以 CPU 允许的最快速度写入
+    realtime: bool = False
+    # 写入到实际发声之间的延迟（秒）
+    latency: float = 0.0
+
+    def __init__(self, sample_rate: int = 24000):
+        self.sample_rate = sample_rate
+
+    def open(self):
+        pass
+
+    def write(self, audio_chunk: np.ndarray):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class PyAudioSink(AudioSink):
+    """PyAudio 声卡输出"""
+
+    realtime = True
+
+    def __init__(self, sample_rate: int = 24000, frames_per_buffer: int = 2048):
+        super().__init__(sample_rate)
+        self.frames_per_buffer = frames_per_buffer
+        self.p = None
+        self.stream = None
+
+    def open(self):
+        import pyaudio
+
+        self.p = pyaudio.PyAudio()
+        self.stream = self.p.open(format=pyaudio.paFloat32,
+                                  channels=1,
+                                  rate=self.sample_rate,
+                                  output=True,
+                                  frames_per_buffer=self.frames_per_buffer)
+        self.latency = self.stream.get_output_latency()
+
+    def write(self, audio_chunk: np.ndarray):
+        self.stream.write(audio_chunk.tobytes()) # type: ignore
+
+    def close(self):
+        if self.stream:
+            self.stream.stop_stream()
+            self.stream.close()
+        if self.p:
+            self.p.terminate()
+
+
+class WavFileSink(AudioSink):
+    """写入 16 位 WAV 文件"""
+
+    def __init__(self, path: str, sample_rate: int = 24000):
+        super().__init__(sample_rate)
+        self.path = path
+        self.wf = None
+
+    def open(self):
+        self.wf = wave.open(self.path, "wb")
+        self.wf.setnchannels(1)
+        self.wf.setsampwidth(2)
+        self.wf.setframerate(self.sample_rate)
+
+    def write(self, audio_chunk: np.ndarray):
+        pcm = np.clip(audio_chunk, -1.0, 1.0) * 32767.0
+        self.wf.writeframes(pcm.astype("<i2").tobytes()) # type: ignore
+
+    def close(self):
+        if self.wf:
+            self.wf.close()
+            self.wf = None
+
+
+class MemorySink(AudioSink):
+    """保存在内存中，用于测试与离线处理"""
+
+    def __init__(self, sample_rate: int = 24000):
+        super().__init__(sample_rate)
+        self.lock = threading.Lock()
+        self.chunks: List[np.ndarray] = []
+
+    def write(self, audio_chunk: np.ndarray):
+        with self.lock:
+            self.chunks.append(np.array(audio_chunk, dtype=np.float32))
+
+    def get_audio(self) -> np.ndarray:
+        """返回迄今写入的全部音频"""
+        with self.lock:
+            if not self.chunks:
+                return np.zeros(0, dtype=np.float32)
+            return np.concatenate(self.chunks)
+
+    def clear(self):
+        with self.lock:
+            self.chunks.clear()
+
+
+class NullSink(AudioSink):
+    """丢弃音频；realtime=True 时按墙钟时间消耗（模拟声卡），否则不限速"""
+
+    def __init__(self, sample_rate: int = 24000, realtime: bool = False):
+        super().__init__(sample_rate)
+        self.realtime = realtime
+        self.deadline = 0.0
+
+    def open(self):
+        self.deadline = time.perf_counter()
+
+    def write(self, audio_chunk: np.ndarray):
+        if not self.realtime:
+            return
+        # 按累计时长计算截止时间，避免逐块 sleep 的误差累积
+        now = time.perf_counter()
+        self.deadline = max(self.deadline, now) + len(audio_chunk) / self.sample_rate
+        time.sleep(max(0.0, self.deadline - now))
+
+
+def create_audio_sink(sink: Optional[str] = "pyaudio", sink_path: Optional[str] = None,
+                      sample_rate: int = 24000, frames_per_buffer: int = 2048) -> AudioSink:
+    """根据配置创建音频输出：
+    None / "pyaudio"    声卡
+    "wav"               写入 sink_path 指定的 WAV 文件
+    "memory"            内存缓冲区
+    "null"              丢弃，不限速（测量纯合成速度）
+    "null_realtime"     丢弃，按墙钟时间消耗
+    """
+    sink = (sink or "pyaudio").lower()
+    if sink == "pyaudio":
+        return PyAudioSink(sample_rate, frames_per_buffer)
+    if sink == "wav":
+        if not sink_path:
+            raise ValueError("sink_path is required for the wav audio sink")
+        return WavFileSink(sink_path, sample_rate)
+    if sink == "memory":
+        return MemorySink(sample_rate)
+    if sink == "null":
+        return NullSink(sample_rate, realtime=False)
+    if sink == "null_realtime":
+        return NullSink(sample_rate, realtime=True)
+    raise ValueError(f"Unknown audio sink: {sink}")
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+import re
+from typing import List
+
+# 句末标点（中文与拉丁文），可带后引号/括号；英文句点后必须是空白或文本结尾，避免切开 3.14 这类数字
+_SENTENCE_END = re.compile(r"([。！？!?；;…]+[”’」』）)\"']*|\.+[\"')]*(?=\s|$)|\n+)")
+# 超长句子的次级切分点
+_CLAUSE_END = re.compile(r"([，,、：:]+)")
+
+
+def _split_keep(pattern: re.Pattern, text: str) -> List[str]:
+    """按正则切分文本，标点保留在前一段末尾"""
+    parts = pattern.split(text)
+    pieces = ["".join(parts[i:i + 2]) for i in range(0, len(parts), 2)]
+    return [piece.strip() for piece in pieces if piece.strip()]
+
+
+def split_sentences(text: str, min_chars: int = 4, max_chars: int = 80) -> List[str]:
+    """将文本按句子切分，过短的句子与下一句合并，过长的句子按逗号等再切分"""
+    sentences: List[str] = []
+    for sentence in _split_keep(_SENTENCE_END, text):
+        if len(sentence) <= max_chars:
+            sentences.append(sentence)
+            continue
+        current = ""
+        for clause in _split_keep(_CLAUSE_END, sentence):
+            if current and len(current) + len(clause) > max_chars:
+                sentences.append(current)
+                current = ""
+            current = f"{current} {clause}" if current and clause[0].isascii() else current + clause
+        if current:
+            sentences.append(current)
+
+    merged: List[str] = []
+    for sentence in sentences:
+        if merged and len(merged[-1]) < min_chars:
+            merged[-1] = f"{merged[-1]} {sentence}" if sentence[0].isascii() else merged[-1] + sentence
+        else:
+            merged.append(sentence)
+    return merged
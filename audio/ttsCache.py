@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+import numpy as np
+
+AUDIO_SUFFIX = ".pcm"  # float16 原始 PCM
+ENVELOPE_SUFFIX = ".env"  # float32 口型帧：按行展平的 (帧数, VISEME_PARAMS) 数组，读取后由调用方 reshape
+
+
+class TTSCache:
+    """按内容寻址的语音缓存：内存 LRU 层 + 磁盘层（float16 原始 PCM），两层均按字节数上限淘汰"""
+
+    def __init__(self, cache_dir: str = "./tts_cache", memory_bytes: int = 64 << 20, disk_bytes: int = 512 << 20):
+        self.cache_dir = cache_dir
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.lock = threading.Lock()
+
+        self._memory: "OrderedDict[str, Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+        self._memory_used = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()  # key -> 字节数，按最近使用排序
+        self._disk_used = 0
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._scan_disk()
+
+    @staticmethod
+    def make_key(**params) -> str:
+        """由合成参数（文本、种子、采样参数、提示词等）计算缓存键"""
+        payload = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.cache_dir, key + suffix)
+
+    def _scan_disk(self):
+        """启动时按最近访问时间重建磁盘索引"""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(AUDIO_SUFFIX):
+                key = entry.name[:-len(AUDIO_SUFFIX)]
+                size = entry.stat().st_size
+                env_path = self._path(key, ENVELOPE_SUFFIX)
+                if os.path.exists(env_path):
+                    size += os.path.getsize(env_path)
+                entries.append((entry.stat().st_mtime, key, size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_used += size
+        self._evict_disk()
+
+    def _remember(self, key: str, audio: np.ndarray, envelope: np.ndarray):
+        """放入内存 LRU 层"""
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        size = audio.nbytes + envelope.nbytes
+        if size > self.memory_bytes:
+            return
+        self._memory[key] = (audio, envelope)
+        self._memory_used += size
+        while self._memory_used > self.memory_bytes:
+            _, (old_audio, old_envelope) = self._memory.popitem(last=False)
+            self._memory_used -= old_audio.nbytes + old_envelope.nbytes
+
+    def _evict_disk(self):
+        while self._disk_used > self.disk_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_used -= size
+            for suffix in (AUDIO_SUFFIX, ENVELOPE_SUFFIX):
+                try:
+                    os.remove(self._path(key, suffix))
+                except FileNotFoundError:
+                    pass
+
+    def get(self, key: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """查询缓存，命中时返回 (float32 音频, 展平的口型帧)"""
+        with self.lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                audio, envelope = self._memory[key]
+                return audio.astype(np.float32), envelope
+
+            if key in self._disk:
+                try:
+                    audio = np.fromfile(self._path(key, AUDIO_SUFFIX), dtype="<f2")
+                    envelope = np.fromfile(self._path(key, ENVELOPE_SUFFIX), dtype="<f4")
+                except FileNotFoundError:
+                    self._disk_used -= self._disk.pop(key)
+                else:
+                    self._disk.move_to_end(key)
+                    os.utime(self._path(key, AUDIO_SUFFIX))
+                    self._remember(key, audio, envelope)
+                    self.hits += 1
+                    return audio.astype(np.float32), envelope
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, audio: np.ndarray, envelope: np.ndarray):
+        """写入缓存（内存与磁盘）"""
+        audio16 = np.asarray(audio, dtype="<f2")
+        envelope32 = np.asarray(envelope, dtype="<f4")
+        with self.lock:
+            self._remember(key, audio16, envelope32)
+            if key in self._disk:
+                return
+            # 先写临时文件再原子替换，避免并发读取到半个文件
+            for suffix, data in ((ENVELOPE_SUFFIX, envelope32), (AUDIO_SUFFIX, audio16)):
+                tmp_path = self._path(key, suffix) + ".tmp"
+                data.tofile(tmp_path)
+                os.replace(tmp_path, self._path(key, suffix))
+            size = audio16.nbytes + envelope32.nbytes
+            self._disk[key] = size
+            self._disk_used += size
+            self._evict_disk()
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_used,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_used,
+            }
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+import os
+import threading
+from typing import Callable, Dict, List, Optional
+
+VOICE_SUFFIX = ".spk"
+
+
+class VoiceRegistry:
+    """命名音色注册表：启动时从磁盘加载所有说话人嵌入，新采样的音色立即持久化"""
+
+    def __init__(self, voice_dir: str = "./voices"):
+        self.voice_dir = voice_dir
+        self.lock = threading.Lock()
+        self.voices: Dict[str, str] = {}
+        os.makedirs(self.voice_dir, exist_ok=True)
+        self._load_all()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.voice_dir, name + VOICE_SUFFIX)
+
+    def _load_all(self):
+        for file_name in sorted(os.listdir(self.voice_dir)):
+            if file_name.endswith(VOICE_SUFFIX):
+                with open(os.path.join(self.voice_dir, file_name), "r", encoding="utf-8") as f:
+                    self.voices[file_name[:-len(VOICE_SUFFIX)]] = f.read().strip()
+
+    def names(self) -> List[str]:
+        with self.lock:
+            return sorted(self.voices)
+
+    def get(self, name: str) -> Optional[str]:
+        with self.lock:
+            return self.voices.get(name)
+
+    def register(self, name: str, embedding: str):
+        """注册并持久化一个音色"""
+        with self.lock:
+            tmp_path = self._path(name) + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(embedding)
+            os.replace(tmp_path, self._path(name))
+            self.voices[name] = embedding
+
+    def get_or_create(self, name: str, sampler: Callable[[], str]) -> str:
+        """获取已注册的音色，不存在时调用 sampler 采样一次并保存"""
+        embedding = self.get(name)
+        if embedding is None:
+            embedding = sampler()
+            self.register(name, embedding)
+        return embedding
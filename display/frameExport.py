@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+import ctypes
+import queue
+import threading
+import time
+from typing import List, Optional
+import numpy as np
+import ffmpeg
+from OpenGL.GL import (
+    GL_PIXEL_PACK_BUFFER,
+    GL_READ_ONLY,
+    GL_RGBA,
+    GL_STREAM_READ,
+    GL_UNSIGNED_BYTE,
+    glBindBuffer,
+    glBufferData,
+    glDeleteBuffers,
+    glGenBuffers,
+    glMapBuffer,
+    glUnmapBuffer,
+)
+from OpenGL.raw.GL.VERSION.GL_1_0 import glReadPixels as glReadPixelsRaw
+
+from log import log
+
+
+class FrameExporter:
+    """画面导出：双缓冲 PBO 异步读回（本帧发起读取、下一帧再映射，不阻塞 GPU），
+    拷贝到可复用的缓冲区池后由写入线程以原始 RGBA 送入 ffmpeg 子进程。
+
+    所有 OpenGL 调用（start / capture / stop）都必须在渲染线程中进行。
+    写入线程跟不上时丢弃新帧而不是阻塞渲染，并计入 dropped。
+
+    ffmpeg 按固定的 fps 解释输入，因此按墙钟时间采样：渲染循环只在 due() 大于 0 时调用 capture()，
+    渲染快于 fps 时跳过多余的帧，慢于 fps 时重复写入同一帧（计入 duplicated），保证导出视频的时间轴正确。
+    """
+
+    def __init__(self, width: int, height: int, output: str, fps: float = 60.0, pool_size: int = 4, **output_kwargs):
+        self.width = width
+        self.height = height
+        self.output = output
+        self.fps = fps
+        self.frame_bytes = width * height * 4
+        self.output_kwargs = output_kwargs or {"pix_fmt": "yuv420p"}
+
+        # 预分配的帧缓冲区：free 为空闲缓冲区，ready 为等待写入 ffmpeg 的缓冲区
+        self.buffers: List[np.ndarray] = [np.empty((height, width, 4), dtype=np.uint8) for _ in range(pool_size)]
+        self.free: queue.Queue = queue.Queue()
+        self.ready: queue.Queue = queue.Queue()
+        for buffer in self.buffers:
+            self.free.put(buffer)
+
+        self.pbos = None
+        self.pbo_index = 0
+        self.pending = False  # 另一个 PBO 中是否有尚未映射的上一帧
+        self.pbo_repeats = [1, 1]  # 每个 PBO 中的画面需要写入的次数
+        self.scheduled = 0  # 已分配到画面的导出帧数
+        self.process = None
+        self.thread = None
+
+        self.captured = 0
+        self.exported = 0
+        self.dropped = 0
+        self.duplicated = 0
+        self.start_time = 0.0
+        self.stop_time: Optional[float] = None
+
+    def start(self):
+        """创建 PBO 并启动 ffmpeg 与写入线程"""
+        self.process = (
+            ffmpeg
+            .input("pipe:", format="rawvideo", pix_fmt="rgba", s=f"{self.width}x{self.height}", framerate=self.fps)
+            .vflip()  # OpenGL 读回的画面自下而上，由 ffmpeg 翻转，省去逐帧拷贝
+            .output(self.output, **self.output_kwargs)
+            .overwrite_output()
+            .global_args("-loglevel", "error")
+            .run_async(pipe_stdin=True)
+        )
+
+        self.pbos = glGenBuffers(2)
+        for pbo in self.pbos:
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, pbo)
+            glBufferData(GL_PIXEL_PACK_BUFFER, self.frame_bytes, None, GL_STREAM_READ)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+
+        self.start_time = time.perf_counter()
+        self.thread = threading.Thread(target=self._writer_thread)
+        self.thread.daemon = True
+        self.thread.start()
+        log("INFO", "FrameExport", f"Exporting {self.width}x{self.height}@{self.fps} to {self.output}")
+
+    def due(self, now: Optional[float] = None) -> int:
+        """截至 now（默认当前时刻）应当输出、但尚未分配画面的导出帧数"""
+        if now is None:
+            now = time.perf_counter()
+        return max(0, int((now - self.start_time) * self.fps) + 1 - self.scheduled)
+
+    def capture(self, repeat: int = 1):
+        """在绘制完成后调用：向当前 PBO 发起异步读回，并取出上一帧（另一个 PBO）的数据；
+        repeat 为本帧画面占用的导出帧数（通常取 due() 的返回值）"""
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, self.pbos[self.pbo_index]) # type: ignore
+        glReadPixelsRaw(0, 0, self.width, self.height, GL_RGBA, GL_UNSIGNED_BYTE, ctypes.c_void_p(0))
+        self.pbo_repeats[self.pbo_index] = max(1, repeat)
+        self.scheduled += max(1, repeat)
+        self.captured += 1
+
+        previous = self.pbo_index ^ 1
+        if self.pending:
+            self._collect(previous)
+        self.pending = True
+        self.pbo_index = previous
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+
+    def _collect(self, index: int):
+        """映射指定 PBO，将画面拷贝到空闲缓冲区并交给写入线程"""
+        repeat = self.pbo_repeats[index]
+        try:
+            buffer = self.free.get_nowait()
+        except queue.Empty:
+            self.dropped += repeat
+            return
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, self.pbos[index]) # type: ignore
+        pointer = glMapBuffer(GL_PIXEL_PACK_BUFFER, GL_READ_ONLY)
+        if pointer:
+            ctypes.memmove(buffer.ctypes.data, pointer, self.frame_bytes)
+            glUnmapBuffer(GL_PIXEL_PACK_BUFFER)
+            self.ready.put((buffer, repeat))
+        else:
+            self.free.put(buffer)
+            self.dropped += repeat
+
+    def _writer_thread(self):
+        """写入线程：将就绪的帧（按需重复）写入 ffmpeg 标准输入，写完后归还缓冲区"""
+        while True:
+            item = self.ready.get()
+            if item is None:
+                break
+            buffer, repeat = item
+            try:
+                data = memoryview(buffer).cast("B")
+                for _ in range(repeat):
+                    self.process.stdin.write(data) # type: ignore
+                    self.exported += 1
+                self.duplicated += repeat - 1
+            except (BrokenPipeError, OSError) as e:
+                log("ERROR", "FrameExport", f"ffmpeg pipe closed: {e}")
+                self.dropped += 1
+            finally:
+                self.free.put(buffer)
+
+    def stop(self) -> dict:
+        """取出最后一帧，等待写入完成并关闭 ffmpeg，返回导出统计"""
+        if self.pending:
+            self._collect(self.pbo_index ^ 1)
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+            self.pending = False
+        self.ready.put(None)
+        if self.thread:
+            self.thread.join()
+        if self.process:
+            self.process.stdin.close() # type: ignore
+            self.process.wait()
+        if self.pbos is not None:
+            glDeleteBuffers(2, self.pbos)
+            self.pbos = None
+        self.stop_time = time.perf_counter()
+        stats = self.get_stats()
+        log("INFO", "FrameExport", f"Export finished: {stats}")
+        return stats
+
+    def get_stats(self) -> dict:
+        elapsed = (self.stop_time or time.perf_counter()) - self.start_time
+        return {
+            "output": self.output,
+            "captured": self.captured,
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "duplicated": self.duplicated,
+            "elapsed": elapsed,
+            "export_fps": self.exported / elapsed if elapsed > 0 else 0.0,
+        }
@@ -4,9 +4,18 @@ import pygame
 import threading
 import queue
 import sys
+import time
 import ctypes
-from typing import Literal, Tuple
+from typing import Literal, Optional, Tuple
+import numpy as np
+from concurrent.futures import Future
 from pygame.locals import DOUBLEBUF, OPENGL
+
+from .offscreen import OffscreenContext, read_pixels
+
+# 无头模式的离屏平台（EGL / OSMesa）由 PYOPENGL_PLATFORM 决定，必须在第一次导入 OpenGL 之前设置；
+# 本模块不做选择，由入口脚本（main.py、live2DBenchmark.py）在导入 display 包之前设置
+
 from OpenGL.GL import (
     GL_COLOR_BUFFER_BIT,
     GL_DEPTH_BUFFER_BIT,
@@ -19,6 +28,9 @@ from OpenGL.GL import (
     glClearColor,
 )
 
+from .frameExport import FrameExporter
+from .renderStats import RenderStats
+
 import live2d.v2 as live2dv2
 from live2d.v2 import StandardParams as StandardParamsv2
 from live2d.v2 import MotionPriority as MotionPriorityv2
@@ -40,14 +52,21 @@ class Live2DModel:
         canvas_width: int = 800,
         canvas_height: int = 600,
         model_type: Literal["v2", "v3"] = "v3",
+        create_window: bool = True,
+        motion_active_time: float = 5.0,
     ):
         self.model_type = model_type
+        # play_motion 启动的动作在结束前（最长 motion_active_time 秒）视为活动，空闲动作不计入
+        self.motion_active_time = motion_active_time
+        self.motion_deadline = 0.0
 
         if model_type == "v2":
             self.model = live2dv2.LAppModel()
         elif model_type == "v3":
-            display = (800, 600)
-            pygame.display.set_mode(display, DOUBLEBUF | OPENGL)
+            # 无头模式下 OpenGL 上下文已由离屏缓冲区提供，不创建窗口
+            if create_window:
+                display = (800, 600)
+                pygame.display.set_mode(display, DOUBLEBUF | OPENGL)
             live2dv3.glewInit()
             self.model = live2dv3.LAppModel()
         else:
@@ -66,6 +85,7 @@ class Live2DModel:
         self.dy = 0.0
         self.scale = 1.0
         self.lip_sync_value = 0.0  # 当前口型值
+        self.mouth_form_value = 0.0  # 当前嘴型值
 
     def update(self, delta_time: float):
         """更新模型状态"""
@@ -85,6 +105,26 @@ class Live2DModel:
         else:
             raise ValueError("Unsupported model type.")
 
+    def set_mouth_form(self, value: float):
+        """设置嘴型（-1 圆唇 ~ 1 展唇）"""
+        self.mouth_form_value = value
+        if self.model_type == "v2":
+            self.model.SetParameterValue(StandardParamsv2.ParamMouthForm, value)
+        elif self.model_type == "v3":
+            self.model.SetParameterValue(StandardParamsv3.ParamMouthForm, value)
+        else:
+            raise ValueError("Unsupported model type.")
+
+    def is_motion_active(self) -> bool:
+        """play_motion 启动的动作是否仍在播放；循环播放的空闲动作不算（空闲动作可能永不结束）"""
+        if time.perf_counter() >= self.motion_deadline:
+            return False
+        is_finished = getattr(self.model, "IsMotionFinished", None)
+        if is_finished and is_finished():
+            self.motion_deadline = 0.0
+            return False
+        return True
+
     def play_motion(self, group: str, no: int):
         """播放指定动作"""
         if self.model_type == "v2":
@@ -93,6 +133,7 @@ class Live2DModel:
             self.model.StartMotion(group, no, MotionPriorityv3.FORCE, None, None)
         else:
             raise ValueError("Unsupported model type.")
+        self.motion_deadline = time.perf_counter() + self.motion_active_time
 
     def set_offset(self, dx: float, dy: float):
         """设置模型偏移量"""
@@ -113,6 +154,13 @@ class live2D_displayer:
         window_pos: Tuple[int, int] = (100, 100),
         type: Literal["live2D", "Live2D"] = "Live2D",
         model_version: Literal["v2", "v3"] = "v3",
+        active_fps: int = 60,
+        idle_fps: int = 15,
+        idle_timeout: float = 1.0,
+        motion_active_time: float = 5.0,
+        headless: bool = False,
+        offscreen_platform: Literal["egl", "osmesa"] = "egl",
+        stats_log_interval: float = 60.0,
         **kwargs,
     ):
         self.model_path: str = model_path
@@ -123,19 +171,46 @@ class live2D_displayer:
         self.running: bool = True
         self.model_version: Literal["v2", "v3"] = model_version
 
-        # 注册口型同步回调
+        # 自适应帧率：说话、拖动、动作播放或收到命令时全速渲染，空闲 idle_timeout 秒后降到 idle_fps
+        self.active_fps: int = active_fps
+        self.idle_fps: int = idle_fps
+        self.idle_timeout: float = idle_timeout
+        self.motion_active_time: float = motion_active_time  # play_motion 启动的动作最长按活动计算的时间
+        self.current_fps: int = active_fps
+
+        # 无头模式：渲染到离屏缓冲区（EGL / OSMesa），不限帧率，通过 get_frame() 取帧
+        # 离屏平台由 PYOPENGL_PLATFORM 决定（OpenGL 导入后无法再切换），已设置时以环境变量为准
+        if headless:
+            platform = os.environ.get("PYOPENGL_PLATFORM")
+            if platform not in ("egl", "osmesa"):
+                raise RuntimeError(
+                    f"Headless mode requires PYOPENGL_PLATFORM to be 'egl' or 'osmesa' before OpenGL is imported (got {platform!r}). "
+                    "Set the environment variable before importing the display package."
+                )
+            offscreen_platform = platform
+        self.headless: bool = headless
+        self.offscreen_platform: Literal["egl", "osmesa"] = offscreen_platform
+        self.offscreen: Optional[OffscreenContext] = None
+        self.frames_rendered: int = 0
+
+        # 画面导出（导出期间保持全速渲染，每帧都绘制）
+        self.exporter: Optional[FrameExporter] = None
+
+        # 渲染统计：帧时间分位数、超时帧数、各阶段耗时与命令队列深度；每 stats_log_interval 秒输出一次日志（0 为不输出）
+        self.render_stats = RenderStats()
+        self.stats_log_interval: float = stats_log_interval
+
+        # 口型同步接口，渲染循环每帧直接读取最新值
         self.lip_sync_interface = kwargs.get("lip_sync_interface", None)
-        if self.lip_sync_interface:
-            self.lip_sync_interface.register_callback(self.set_lip_sync_value)
+
+        # 命令队列（需在窗口线程启动前创建）
+        self.command_queue = queue.Queue()
 
         # 创建窗口线程
         self.thread = threading.Thread(target=self._run_window)
         self.thread.daemon = True
         self.thread.start()
 
-        # 命令队列
-        self.command_queue = queue.Queue()
-
     def __del__(self):
         if self.thread:
             self.thread.join(timeout=5)
@@ -148,6 +223,101 @@ class live2D_displayer:
         """播放指定动作（线程安全）"""
         self.command_queue.put(("motion", group, no))
 
+    def get_frame(self, timeout: Optional[float] = None) -> np.ndarray:
+        """请求渲染线程在下一帧绘制后读回画面，返回 (高, 宽, 4) 的 RGBA uint8 数组（线程安全）"""
+        future: Future = Future()
+        self.command_queue.put(("frame", future))
+        return future.result(timeout=timeout)
+
+    def get_render_stats(self) -> dict:
+        """获取渲染统计（线程安全）"""
+        return self.render_stats.report()
+
+    def _stage(self, stage: str, start: float) -> float:
+        """记录从 start 到现在的阶段耗时，返回当前时刻作为下一阶段的起点"""
+        now = time.perf_counter()
+        self.render_stats.record(stage, now - start)
+        return now
+
+    def start_export(self, output: str, fps: Optional[float] = None, **output_kwargs):
+        """开始将渲染画面导出到 ffmpeg（文件路径或 URL，如 rtmp://、/dev/video* 等），output_kwargs 传给 ffmpeg output（线程安全）"""
+        self.command_queue.put(("export_start", output, fps, output_kwargs))
+
+    def stop_export(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """停止导出，返回导出统计（导出帧率、丢帧数等）（线程安全）"""
+        future: Future = Future()
+        self.command_queue.put(("export_stop", future))
+        return future.result(timeout=timeout)
+
+    def _handle_export_command(self, command: str, args: list):
+        """在渲染线程中处理导出命令"""
+        if command == "export_start":
+            output, fps, output_kwargs = args
+            if self.exporter:
+                self.exporter.stop()
+            exporter = FrameExporter(self.canvas_width, self.canvas_height, output, fps or self.active_fps, **output_kwargs)
+            try:
+                exporter.start()
+            except Exception as e:
+                log("ERROR", "Live2D", f"Failed to start frame export: {e}")
+                return
+            self.exporter = exporter
+        elif command == "export_stop":
+            future = args[0]
+            stats = self.exporter.stop() if self.exporter else None
+            self.exporter = None
+            future.set_result(stats)
+
+    def _window_mover(self, flags: int):
+        """返回移动窗口的函数：优先通过 SDL2 窗口接口直接移动现有窗口（不重建 OpenGL 上下文），
+        pygame 不支持时退回到设置 SDL_VIDEO_WINDOW_POS 后重新 set_mode"""
+        try:
+            from pygame._sdl2.video import Window
+
+            window = Window.from_display_module()
+
+            def move(x: int, y: int):
+                window.position = (x, y)
+
+            log("INFO", "Live2D", "Window dragging via SDL2 window position.")
+            return move
+        except (ImportError, AttributeError, pygame.error) as e:
+            log("WARNING", "Live2D", f"SDL2 window API unavailable ({e}), window dragging will recreate the GL surface.")
+
+        def move_by_set_mode(x: int, y: int):
+            os.environ["SDL_VIDEO_WINDOW_POS"] = f"{x},{y}"
+            pygame.display.set_mode((self.canvas_width, self.canvas_height), flags)
+
+        return move_by_set_mode
+
+    def _drain_commands(self) -> Tuple[bool, Optional[float], list, bool, list, list]:
+        """一次取出本帧之前积压的所有命令并合并：口型只保留最新值；动作以 FORCE 优先级播放，后一个会立即替换前一个，
+        因此只保留最后请求的动作。
+        返回 (是否有命令, 最新口型值, 要播放的动作列表（至多一个）, 是否退出, 取帧请求列表, 按顺序的导出命令)"""
+        received = False
+        lip_sync_value = None
+        motion = None
+        quit_requested = False
+        frame_requests = []
+        export_commands = []
+        while True:
+            try:
+                command, *args = self.command_queue.get_nowait()
+            except queue.Empty:
+                break
+            received = True
+            if command == "lip_sync":
+                lip_sync_value = args[0]
+            elif command == "motion":
+                motion = (args[0], args[1])
+            elif command == "quit":
+                quit_requested = True
+            elif command == "frame":
+                frame_requests.append(args[0])
+            elif command in ("export_start", "export_stop"):
+                export_commands.append((command, args))
+        return received, lip_sync_value, [motion] if motion else [], quit_requested, frame_requests, export_commands
+
     def close(self):
         """关闭窗口"""
         self.command_queue.put(("quit",))
@@ -157,7 +327,8 @@ class live2D_displayer:
     def _run_window(self):
         """窗口主循环"""
         # 初始化Pygame和OpenGL
-        pygame.init()
+        if not self.headless:
+            pygame.init()
         if self.model_version == "v2":
             live2dv2.init()
             live2dv2.setLogEnable(False)
@@ -173,7 +344,11 @@ class live2D_displayer:
         flags = pygame.DOUBLEBUF | pygame.OPENGL | pygame.NOFRAME
 
         # 跨平台透明窗口设置
-        if sys.platform == "win32":
+        if self.headless:
+            # 无头模式：创建离屏 OpenGL 上下文，不需要显示服务器
+            self.offscreen = OffscreenContext(self.canvas_width, self.canvas_height, self.offscreen_platform)
+            self.offscreen.make_current()
+        elif sys.platform == "win32":
             # Windows透明窗口设置
             pygame.display.gl_set_attribute(pygame.GL_ALPHA_SIZE, 8)
             self.screen = pygame.display.set_mode(
@@ -228,6 +403,8 @@ class live2D_displayer:
                 self.canvas_width,
                 self.canvas_height,
                 self.model_version,
+                create_window=not self.headless,
+                motion_active_time=self.motion_active_time,
             )
         else:
             log("ERROR", "Live2D", f"Model file not found: {self.model_path}")
@@ -235,66 +412,138 @@ class live2D_displayer:
 
         # 窗口拖动状态
         dragging = False
-        last_mouse_pos = (0, 0)
+        grab_offset = (0, 0)
         # 当前窗口位置（手动维护）
         window_x, window_y = self.window_pos
+        if sys.platform != "win32" and not self.headless:
+            move_window = self._window_mover(flags)
 
         clock = pygame.time.Clock()
+        last_active_time = time.perf_counter()
 
         log("INFO", "Live2D", "Live2D display Started.")
 
+        last_frame_time = time.perf_counter()
+        last_stats_log = last_frame_time
+        self.render_stats.reset()
+
         while self.running:
-            delta_time = clock.tick(60) / 1000.0
-
-            # 处理命令队列
-            while not self.command_queue.empty():
-                command, *args = self.command_queue.get()
-                if command == "lip_sync":
-                    self.lip_sync_value = args[0]
-                elif command == "motion":
-                    self.model.play_motion(args[0], args[1])
-                elif command == "quit":
-                    self.running = False
+            if self.headless:
+                # 无头模式不限帧率
+                budget = 0.0
+                now = time.perf_counter()
+                delta_time = now - last_frame_time
+                last_frame_time = now
+            else:
+                budget = 1.0 / self.current_fps
+                delta_time = clock.tick(self.current_fps) / 1000.0
+            active = dragging
+            target_pos = None
+            stage_start = time.perf_counter()
+
+            # 处理命令队列（每帧合并一次）
+            queue_depth = self.command_queue.qsize()
+            received, lip_sync_value, motions, quit_requested, frame_requests, export_commands = self._drain_commands()
+            if received:
+                active = True
+            if lip_sync_value is not None:
+                self.lip_sync_value = lip_sync_value
+            for group, no in motions:
+                self.model.play_motion(group, no)
+            for command, args in export_commands:
+                self._handle_export_command(command, args)
+            if quit_requested:
+                self.running = False
+            stage_start = self._stage("commands", stage_start)
 
             # 处理事件
-            for event in pygame.event.get():
+            for event in ([] if self.headless else pygame.event.get()):
+                # 除了未拖动时的鼠标移动，窗口事件（拖动、重新显示等）都视为活动
+                if event.type != pygame.MOUSEMOTION or dragging:
+                    active = True
                 if event.type == pygame.QUIT:
                     self.running = False
                 elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                     dragging = True
-                    last_mouse_pos = pygame.mouse.get_pos()
+                    # 记录按下时鼠标在窗口内的位置，拖动时保持该点跟随鼠标
+                    grab_offset = event.pos
                 elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
                     dragging = False
                 elif event.type == pygame.MOUSEMOTION and dragging:
-                    current_pos = pygame.mouse.get_pos()
-                    dx = current_pos[0] - last_mouse_pos[0]
-                    dy = current_pos[1] - last_mouse_pos[1]
-
-                    # 更新窗口位置（跨平台）
-                    window_x += dx
-                    window_y += dy
-
-                    # 设置新位置
-                    if sys.platform == "win32":
-                        user32.SetWindowPos(hwnd, -1, window_x, window_y, 0, 0, 0x0001)
-                    else:
-                        # Linux/MacOS设置窗口位置
-                        os.environ["SDL_VIDEO_WINDOW_POS"] = f"{window_x},{window_y}"
-                        pygame.display.set_mode(
-                            (self.canvas_width, self.canvas_height), flags
-                        )
-
-                    last_mouse_pos = current_pos
-
-            # 更新模型口型
-            self.model.set_lip_sync_value(self.lip_sync_value)
+                    # event.pos 相对于窗口当前位置，换算为新的窗口位置；同一帧内的多次移动只生效最后一次
+                    target_pos = (
+                        window_x + event.pos[0] - grab_offset[0],
+                        window_y + event.pos[1] - grab_offset[1],
+                    )
+
+            # 移动窗口（每帧最多一次）
+            if target_pos is not None and target_pos != (window_x, window_y):
+                window_x, window_y = target_pos
+                if sys.platform == "win32":
+                    user32.SetWindowPos(hwnd, -1, window_x, window_y, 0, 0, 0x0001)
+                else:
+                    move_window(window_x, window_y)
+            stage_start = self._stage("events", stage_start)
+
+            # 更新模型口型：渲染时按当前时刻从播放时间轴上取值，与声音对齐
+            speaking = False
+            if self.lip_sync_interface:
+                # 每帧都读取以推进平滑状态，但只在说话（含口型回落）期间写入参数，避免覆盖动作与表情驱动的嘴部
+                lip_sync_value, mouth_form = self.lip_sync_interface.read()
+                speaking = self.lip_sync_interface.is_active()
+                if speaking:
+                    self.model.set_lip_sync_value(float(lip_sync_value))
+                    self.model.set_mouth_form(float(mouth_form))
+            else:
+                self.model.set_lip_sync_value(self.lip_sync_value)
             self.model.update(delta_time)
-
-            # 渲染
+            stage_start = self._stage("update", stage_start)
+
+            # 根据活动情况调整帧率
+            now = time.perf_counter()
+            if speaking:
+                active = True
+            if self.exporter:
+                active = True
+            motion_playing = self.model.is_motion_active()
+            if active or motion_playing:
+                last_active_time = now
+            fps = self.active_fps if now - last_active_time < self.idle_timeout else self.idle_fps
+            if fps != self.current_fps:
+                log("DEBUG", "Live2D", f"Frame rate: {self.current_fps} -> {fps} fps")
+                self.current_fps = fps
+
+            # 渲染：自动呼吸、眨眼与空闲动作每帧都会改变画面，因此每次循环都绘制，空闲时由 idle_fps 降低开销
+            stage_start = time.perf_counter()
             glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT) # type: ignore
             self.model.draw()
-            pygame.display.flip()
-
+            stage_start = self._stage("draw", stage_start)
+            # 导出按墙钟时间对齐到导出帧率：未到下一导出帧的时刻时不读回（无头模式渲染远快于导出帧率）
+            export_due = self.exporter.due() if self.exporter else 0
+            if frame_requests or export_due:
+                if frame_requests:
+                    frame = read_pixels(self.canvas_width, self.canvas_height)
+                    for future in frame_requests:
+                        future.set_result(frame)
+                if export_due:
+                    self.exporter.capture(export_due) # type: ignore
+                stage_start = self._stage("export", stage_start)
+            if not self.headless:
+                pygame.display.flip()
+                self._stage("flip", stage_start)
+            self.frames_rendered += 1
+
+            # 帧统计与定期日志
+            self.render_stats.add_frame(delta_time, budget, queue_depth)
+            if self.stats_log_interval > 0:
+                stats_now = time.perf_counter()
+                if stats_now - last_stats_log >= self.stats_log_interval:
+                    log("INFO", "Live2D", f"Render stats: {self.render_stats.format_report()}")
+                    last_stats_log = stats_now
+
+        if self.exporter:
+            self.exporter.stop()
+            self.exporter = None
         log("INFO", "Live2D", "Live2D display closed.")
         # 清理资源
         if self.model_version == "v2":
@@ -303,4 +552,32 @@ class live2D_displayer:
             live2dv3.dispose()
         else:
             raise ValueError("Unsupported model version. Use 'v2' or 'v3'.")
-        pygame.quit()
+        if self.offscreen:
+            self.offscreen.close()
+        else:
+            pygame.quit()
+
+
+def benchmark(model_path: str, duration: float = 10.0, canvas_width: int = 800, canvas_height: int = 600,
+              model_version: Literal["v2", "v3"] = "v3", headless: bool = True,
+              offscreen_platform: Literal["egl", "osmesa"] = "egl"):
+    """测量渲染帧率：无头模式下不限帧率，可在没有 GPU 和显示服务器的机器上运行（命令行入口见 live2DBenchmark.py）"""
+    displayer = live2D_displayer(
+        model_path,
+        canvas_width,
+        canvas_height,
+        model_version=model_version,
+        headless=headless,
+        offscreen_platform=offscreen_platform,
+    )
+    displayer.get_frame(timeout=60.0)  # 等待模型加载完成并渲染出第一帧
+    start_frames = displayer.frames_rendered
+    t0 = time.perf_counter()
+    time.sleep(duration)
+    frames = displayer.frames_rendered - start_frames
+    elapsed = time.perf_counter() - t0
+    report = displayer.render_stats.format_report()
+    displayer.close()
+    print(f"[Live2D] {frames} frames in {elapsed:.2f}s: {frames / elapsed:.1f} fps, {elapsed * 1000 / max(frames, 1):.2f} ms/frame")
+    print(f"[Live2D] {report}")
+
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+import ctypes
+from typing import Literal
+import numpy as np
+
+OffscreenPlatform = Literal["egl", "osmesa"]
+
+
+def read_pixels(width: int, height: int) -> np.ndarray:
+    """读取当前绑定的帧缓冲区，返回 (高, 宽, 4) 的 RGBA uint8 数组（第一行为画面顶部）"""
+    from OpenGL.GL import GL_RGBA, GL_UNSIGNED_BYTE, glReadPixels
+
+    data = glReadPixels(0, 0, width, height, GL_RGBA, GL_UNSIGNED_BYTE)
+    frame = np.frombuffer(data, dtype=np.uint8).reshape(height, width, 4) # type: ignore
+    return frame[::-1].copy()
+
+
+class OffscreenContext:
+    """无窗口的 OpenGL 上下文：EGL pbuffer（可使用 GPU 或 Mesa llvmpipe）或 OSMesa（纯软件渲染），
+    不需要显示服务器"""
+
+    def __init__(self, width: int, height: int, platform: OffscreenPlatform = "egl"):
+        self.width = width
+        self.height = height
+        self.platform = platform
+        if platform == "egl":
+            self._create_egl()
+        elif platform == "osmesa":
+            self._create_osmesa()
+        else:
+            raise ValueError(f"Unsupported offscreen platform: {platform}. Use 'egl' or 'osmesa'.")
+
+    def _create_egl(self):
+        from OpenGL import EGL
+
+        self.display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+        major, minor = EGL.EGLint(), EGL.EGLint()
+        if not EGL.eglInitialize(self.display, ctypes.pointer(major), ctypes.pointer(minor)):
+            raise RuntimeError("eglInitialize failed")
+
+        config_attribs = (EGL.EGLint * 17)(
+            EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+            EGL.EGL_RED_SIZE, 8,
+            EGL.EGL_GREEN_SIZE, 8,
+            EGL.EGL_BLUE_SIZE, 8,
+            EGL.EGL_ALPHA_SIZE, 8,
+            EGL.EGL_DEPTH_SIZE, 24,
+            EGL.EGL_STENCIL_SIZE, 8,
+            EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+            EGL.EGL_NONE,
+        )
+        config = EGL.EGLConfig()
+        num_configs = EGL.EGLint()
+        if not EGL.eglChooseConfig(self.display, config_attribs, ctypes.pointer(config), 1, ctypes.pointer(num_configs)) \
+                or num_configs.value == 0:
+            raise RuntimeError("eglChooseConfig found no RGBA pbuffer config")
+
+        surface_attribs = (EGL.EGLint * 5)(EGL.EGL_WIDTH, self.width, EGL.EGL_HEIGHT, self.height, EGL.EGL_NONE)
+        self.surface = EGL.eglCreatePbufferSurface(self.display, config, surface_attribs)
+        if self.surface == EGL.EGL_NO_SURFACE:
+            raise RuntimeError("eglCreatePbufferSurface failed")
+
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+        self.context = EGL.eglCreateContext(self.display, config, EGL.EGL_NO_CONTEXT, None)
+        if self.context == EGL.EGL_NO_CONTEXT:
+            raise RuntimeError("eglCreateContext failed")
+
+    def _create_osmesa(self):
+        from OpenGL import GL, arrays, osmesa
+
+        self.context = osmesa.OSMesaCreateContextExt(osmesa.OSMESA_RGBA, 24, 8, 0, None)
+        if not self.context:
+            raise RuntimeError("OSMesaCreateContextExt failed")
+        self.buffer = arrays.GLubyteArray.zeros((self.height, self.width, 4))
+        self._gl_unsigned_byte = GL.GL_UNSIGNED_BYTE
+
+    def make_current(self):
+        """将上下文绑定到当前线程（渲染线程中调用）"""
+        if self.platform == "egl":
+            from OpenGL import EGL
+
+            if not EGL.eglMakeCurrent(self.display, self.surface, self.surface, self.context):
+                raise RuntimeError("eglMakeCurrent failed")
+        else:
+            from OpenGL import osmesa
+
+            if not osmesa.OSMesaMakeCurrent(self.context, self.buffer, self._gl_unsigned_byte, self.width, self.height):
+                raise RuntimeError("OSMesaMakeCurrent failed")
+
+    def read_frame(self) -> np.ndarray:
+        """读取当前帧，返回 (高, 宽, 4) 的 RGBA uint8 数组（第一行为画面顶部）"""
+        return read_pixels(self.width, self.height)
+
+    def close(self):
+        if self.platform == "egl":
+            from OpenGL import EGL
+
+            EGL.eglMakeCurrent(self.display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, EGL.EGL_NO_CONTEXT)
+            EGL.eglDestroySurface(self.display, self.surface)
+            EGL.eglDestroyContext(self.display, self.context)
+            EGL.eglTerminate(self.display)
+        else:
+            from OpenGL import osmesa
+
+            osmesa.OSMesaDestroyContext(self.context)
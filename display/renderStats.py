@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+import threading
+import time
+from collections import deque
+from typing import Dict
+import numpy as np
+
+
+class RenderStats:
+    """渲染循环统计：滚动窗口内的帧时间分位数、超时帧数、各阶段耗时与命令队列深度"""
+
+    def __init__(self, window: int = 600):
+        self.window = window
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.start_time = time.perf_counter()
+            self.frames = 0
+            self.missed_deadlines = 0
+            self.frame_times: deque = deque(maxlen=self.window)
+            self.queue_depths: deque = deque(maxlen=self.window)
+            self.stage_recent: Dict[str, deque] = {}
+
+    def record(self, stage: str, seconds: float):
+        """记录某一阶段在本帧的耗时"""
+        with self.lock:
+            if stage not in self.stage_recent:
+                self.stage_recent[stage] = deque(maxlen=self.window)
+            self.stage_recent[stage].append(seconds)
+
+    def add_frame(self, frame_time: float, budget: float, queue_depth: int):
+        """记录一帧：帧间隔、本帧的时间预算（1 / 目标帧率）以及帧开始时的命令队列深度"""
+        with self.lock:
+            self.frames += 1
+            self.frame_times.append(frame_time)
+            self.queue_depths.append(queue_depth)
+            # 超过预算一半以上视为错过了一次刷新
+            if budget > 0 and frame_time > budget * 1.5:
+                self.missed_deadlines += 1
+
+    def report(self) -> dict:
+        with self.lock:
+            wall = time.perf_counter() - self.start_time
+            frame_times = np.fromiter(self.frame_times, dtype=np.float64)
+            queue_depths = np.fromiter(self.queue_depths, dtype=np.float64)
+            stages = {}
+            for stage, recent_deque in self.stage_recent.items():
+                recent = np.fromiter(recent_deque, dtype=np.float64)
+                if len(recent) == 0:
+                    continue
+                stages[stage] = {
+                    "mean_ms": float(recent.mean()) * 1000.0,
+                    "p95_ms": float(np.percentile(recent, 95)) * 1000.0,
+                    "max_ms": float(recent.max()) * 1000.0,
+                }
+            if len(frame_times):
+                p50, p95, p99 = np.percentile(frame_times, [50, 95, 99]) * 1000.0
+                frame = {
+                    "mean_ms": float(frame_times.mean()) * 1000.0,
+                    "p50_ms": float(p50),
+                    "p95_ms": float(p95),
+                    "p99_ms": float(p99),
+                    "max_ms": float(frame_times.max()) * 1000.0,
+                }
+            else:
+                frame = {"mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+            return {
+                "wall_seconds": wall,
+                "frames": self.frames,
+                "fps": self.frames / wall if wall > 0 else 0.0,
+                "missed_deadlines": self.missed_deadlines,
+                "frame_time": frame,
+                "queue_depth_mean": float(queue_depths.mean()) if len(queue_depths) else 0.0,
+                "queue_depth_max": int(queue_depths.max()) if len(queue_depths) else 0,
+                "stages": stages,
+            }
+
+    def format_report(self) -> str:
+        report = self.report()
+        f = report["frame_time"]
+        line = (
+            f"fps={report['fps']:.1f} frames={report['frames']} "
+            f"missed={report['missed_deadlines']} frame p50={f['p50_ms']:.2f}ms p95={f['p95_ms']:.2f}ms "
+            f"p99={f['p99_ms']:.2f}ms max={f['max_ms']:.2f}ms "
+            f"queue mean={report['queue_depth_mean']:.1f} max={report['queue_depth_max']}"
+        )
+        stages = " ".join(
+            f"{stage}={s['mean_ms']:.2f}/{s['p95_ms']:.2f}ms" for stage, s in report["stages"].items()
+        )
+        return f"{line} | stages(mean/p95): {stages}" if stages else line
@@ -1,51 +1,163 @@
 #!/usr/bin/env python3
-import queue
 import threading
-from typing import Callable
+import time
+from collections import deque
+from typing import Optional
+import numpy as np
+
+# 口型包络的帧率，与显示刷新率一致
+LIP_SYNC_RATE = 60
+
+# 口型帧的参数：每帧为 [张嘴程度, 嘴型]
+MOUTH_OPEN = 0  # 对应 ParamMouthOpenY，取 RMS
+MOUTH_FORM = 1  # 对应 ParamMouthForm，-1 为圆唇（o/u），1 为展唇（i/e）
+VISEME_PARAMS = 2
+
+
+class VisemeAnalyzer:
+    """口型分析：将整段音频按显示帧率分帧，批量 rfft 计算每帧 RMS 与频谱质心，映射为 [张嘴程度, 嘴型]"""
+
+    def __init__(self, sample_rate: int = 24000, frame_size: int = 400,
+                 low_hz: float = 500.0, high_hz: float = 3000.0, silence_rms: float = 1e-3):
+        self.sample_rate = sample_rate
+        self.frame_size = frame_size
+        self.silence_rms = silence_rms
+        self.window = np.hanning(frame_size).astype(np.float32)
+        # 只统计语音主要能量所在的频段
+        freqs = np.fft.rfftfreq(frame_size, 1.0 / sample_rate)
+        self.band = (freqs >= 80.0) & (freqs <= 5000.0)
+        self.band_freqs = freqs[self.band].astype(np.float32)
+        # 质心在 low_hz ~ high_hz 之间（对数刻度）线性映射到 -1 ~ 1
+        self.log_low = np.log(low_hz)
+        self.log_range = np.log(high_hz) - self.log_low
+
+    def analyze(self, audio: np.ndarray) -> np.ndarray:
+        """返回形状为 (帧数, VISEME_PARAMS) 的口型帧，最后不足一帧的部分补零"""
+        n_frames = -(-len(audio) // self.frame_size)
+        frames = np.zeros(n_frames * self.frame_size, dtype=np.float32)
+        frames[:len(audio)] = audio
+        frames = frames.reshape(n_frames, self.frame_size)
+
+        result = np.zeros((n_frames, VISEME_PARAMS), dtype=np.float32)
+        result[:, MOUTH_OPEN] = np.sqrt(np.mean(np.square(frames), axis=1))
+
+        spectrum = np.abs(np.fft.rfft(frames * self.window, axis=1))[:, self.band]
+        total = spectrum.sum(axis=1)
+        voiced = (result[:, MOUTH_OPEN] > self.silence_rms) & (total > 0)
+        centroid = spectrum[voiced] @ self.band_freqs / total[voiced]
+        form = 2.0 * (np.log(np.maximum(centroid, 1.0)) - self.log_low) / self.log_range - 1.0
+        result[voiced, MOUTH_FORM] = np.clip(form, -1.0, 1.0)
+        return result
+
 
 class LipSyncInterface:
-    def __init__(self):
-        self.rms_queue = queue.Queue()
-        self.callback = None
+    """口型同步通道：只保留最新值（不排队），渲染循环每帧直接读取，并做起音/释音平滑"""
+
+    def __init__(self, max_segments: int = 1024, attack: float = 0.03, release: float = 0.12):
         self.running = False
-        self.thread = None
         self.sensitivity = 3.0  # 口型同步灵敏度系数
-    
-    def register_callback(self, callback: Callable[[float], None]):
-        """注册口型同步回调函数"""
-        self.callback = callback
+        self.attack = attack  # 张嘴平滑时间常数（秒）
+        self.release = release  # 闭嘴平滑时间常数（秒）
+
+        # 最新值槽位：写入方直接覆盖，读取方只取最新值；单个属性赋值本身是原子的，无需加锁
+        self.latest_rms = 0.0
+        # 平滑状态 [张嘴程度, 嘴型]，仅由渲染线程读写
+        self.value = np.zeros(VISEME_PARAMS, dtype=np.float32)
+        self.last_read_time: Optional[float] = None
+
+        # 按播放时间戳排列的口型帧：(开始时间, 结束时间, 帧时长, 口型帧)，时间为 time.perf_counter()
+        self.timeline_lock = threading.Lock()
+        self.timeline: deque = deque(maxlen=max_segments)
     
     def start(self):
-        """启动口型同步处理线程"""
-        if self.running:
-            return
-        
+        """保留以兼容旧接口：口型值由渲染循环直接读取，不再需要处理线程"""
         self.running = True
-        self.thread = threading.Thread(target=self._process_rms)
-        self.thread.daemon = True
-        self.thread.start()
     
     def stop(self):
-        """停止口型同步处理"""
+        """保留以兼容旧接口"""
         self.running = False
-        if self.thread:
-            self.thread.join(timeout=1.0)
     
     def put_rms(self, rms_value: float):
-        """添加新的RMS值到队列"""
-        self.rms_queue.put(rms_value)
-    
-    def _process_rms(self):
-        """处理RMS队列中的值并调用回调"""
-        while self.running:
-            try:
-                rms = self.rms_queue.get(timeout=0.1)
-                if self.callback:
-                    # 应用灵敏度系数并调用回调
-                    self.callback(rms * self.sensitivity)
-            except queue.Empty:
-                continue
+        """写入最新的RMS值（覆盖旧值）"""
+        self.latest_rms = rms_value
     
+    def put_envelope(self, start_time: float, envelope: np.ndarray, frame_rate: float = LIP_SYNC_RATE):
+        """添加一段从 start_time（播放时钟）开始、按 frame_rate 分帧的口型帧；
+        envelope 为 (帧数, VISEME_PARAMS) 的口型帧，或一维的 RMS 包络（嘴型保持中性）"""
+        if len(envelope) == 0:
+            return
+        if envelope.ndim == 1:
+            frames = np.zeros((len(envelope), VISEME_PARAMS), dtype=np.float32)
+            frames[:, MOUTH_OPEN] = envelope
+            envelope = frames
+        frame_duration = 1.0 / frame_rate
+        with self.timeline_lock:
+            self.timeline.append((start_time, start_time + len(envelope) * frame_duration, frame_duration, envelope))
+
+    def sample(self, t: Optional[float] = None) -> Optional[np.ndarray]:
+        """取播放时刻 t（默认当前时刻）的口型帧 [张嘴程度, 嘴型]（已乘灵敏度），没有正在播放的包络时返回 None"""
+        if t is None:
+            t = time.perf_counter()
+        with self.timeline_lock:
+            # 丢弃已经播放完的包络
+            while self.timeline and self.timeline[0][1] <= t:
+                self.timeline.popleft()
+            if not self.timeline:
+                return None
+            start, _, frame_duration, envelope = self.timeline[0]
+            if t < start:
+                return None
+            index = min(int((t - start) / frame_duration), len(envelope) - 1)
+            frame = envelope[index].astype(np.float32)
+        frame[MOUTH_OPEN] *= self.sensitivity
+        return frame
+
+    def read(self, t: Optional[float] = None) -> np.ndarray:
+        """渲染循环每帧调用一次：取当前口型帧（正在播放的包络优先，否则为最新RMS值）并做起音/释音平滑，
+        返回 [张嘴程度, 嘴型]"""
+        if t is None:
+            t = time.perf_counter()
+        target = self.sample(t)
+        if target is None:
+            target = np.zeros(VISEME_PARAMS, dtype=np.float32)
+            target[MOUTH_OPEN] = self.latest_rms * self.sensitivity
+        dt = 0.0 if self.last_read_time is None else max(0.0, t - self.last_read_time)
+        self.last_read_time = t
+        tau = np.where(target > self.value, self.attack, self.release)
+        alpha = 1.0 - np.exp(-dt / np.maximum(tau, 1e-6))
+        self.value = (self.value + (target - self.value) * alpha).astype(np.float32)
+        return self.value.copy()
+
+    def is_active(self, threshold: float = 0.01) -> bool:
+        """是否正在（或即将）说话：有未播放完的口型帧，或口型尚未回落到静止"""
+        with self.timeline_lock:
+            if self.timeline:
+                return True
+        return self.latest_rms * self.sensitivity > threshold or float(np.max(np.abs(self.value))) > threshold
+
+    def clear(self):
+        """清空尚未播放的包络与最新值（语音被打断时立即闭嘴）"""
+        with self.timeline_lock:
+            self.timeline.clear()
+        self.latest_rms = 0.0
+
     def set_sensitivity(self, sensitivity: float):
         """设置口型同步灵敏度"""
         self.sensitivity = max(0.1, min(sensitivity, 10.0))
+
+
+def benchmark(seconds: float = 10.0, sample_rate: int = 24000):
+    """测量口型分析的 CPU 开销（每秒音频耗时）"""
+    audio = (np.random.default_rng(0).standard_normal(int(seconds * sample_rate)) * 0.1).astype(np.float32)
+    analyzer = VisemeAnalyzer(sample_rate, sample_rate // LIP_SYNC_RATE)
+    analyzer.analyze(audio)  # 预热
+    repeats = 20
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        analyzer.analyze(audio)
+    elapsed = (time.perf_counter() - t0) / repeats
+    print(f"[VisemeAnalyzer] {seconds:.0f} s audio in {elapsed * 1000:.2f} ms: {elapsed * 1000 / seconds:.3f} ms per second of audio")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,27 @@
+#!/usr/bin/env python
+# Live2D 渲染基准测试入口：python live2DBenchmark.py path/to/model3.json --headless
+# 无头模式的离屏平台必须在第一次导入 OpenGL 之前选定，而导入 display 包就会导入 OpenGL，
+# 因此先解析参数并设置 PYOPENGL_PLATFORM，再导入 display
+import argparse
+import os
+
+from config import Display_Args
+
+parser = argparse.ArgumentParser(description="Live2D render benchmark")
+parser.add_argument("model_path", nargs="?", default=Display_Args.get("model_path"), help="model3.json / model.json")
+parser.add_argument("--headless", action="store_true", help="render offscreen (EGL / OSMesa)")
+parser.add_argument("--offscreen-platform", default=Display_Args.get("offscreen_platform", "egl"), choices=["egl", "osmesa"],
+                    help="offscreen platform for --headless (PYOPENGL_PLATFORM takes precedence when set)")
+parser.add_argument("--duration", type=float, default=10.0, help="seconds to measure")
+parser.add_argument("--width", type=int, default=Display_Args.get("canvas_width", 800))
+parser.add_argument("--height", type=int, default=Display_Args.get("canvas_height", 600))
+parser.add_argument("--model-version", default=Display_Args.get("model_version", "v3"), choices=["v2", "v3"])
+args = parser.parse_args()
+
+if args.headless:
+    # 已设置 PYOPENGL_PLATFORM 时以环境变量为准
+    os.environ.setdefault("PYOPENGL_PLATFORM", args.offscreen_platform)
+
+from display.live2D import benchmark
+
+benchmark(args.model_path, args.duration, args.width, args.height, args.model_version, args.headless, args.offscreen_platform)
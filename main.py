@@ -1,4 +1,11 @@
 #!/usr/bin/env python
+import os
+
+from config import Display_Args, Audio_Args, SpeechRecog_Args, LLM_Full_Args, LLM_Small_Args, MM_Args, Common_Args, Prompts, Character
+
+# 无头模式的离屏平台（EGL / OSMesa）必须在第一次导入 OpenGL（即导入 display 包）之前选择，已设置 PYOPENGL_PLATFORM 时以环境变量为准
+if Display_Args.get("headless", False):
+    os.environ.setdefault("PYOPENGL_PLATFORM", Display_Args.get("offscreen_platform", "egl"))
 
 # Factory Classes
 from audio.general import AudioGen
@@ -10,46 +17,11 @@ from memory.AmpliGraph import MemoryManager
 from Characteristic.Avatar import Avatar
 from lipsync import LipSyncInterface
 from log import log
+import sys
 import time
 
-from config import Display_Args, Audio_Args, SpeechRecog_Args, LLM_Full_Args, LLM_Small_Args, MM_Args, Common_Args, Prompts, Character
-
-# 1. initialize: Display Live2D model, run subthreads, load memory
-
-# 创建口型同步接口
-lip_sync = LipSyncInterface()
-lip_sync.start()
-
-# 创建显示组件
-displayer = Displayer(lip_sync_interface=lip_sync, **Display_Args)
-
-# ***************************************************************************************************
-
-# 创建语音生成器
-voice_gen = AudioGen(lip_sync_interface=lip_sync, **Audio_Args)
-# 创建语音识别器
-speech_recog = SpeechRecog(**SpeechRecog_Args)
-# 创建文本生成器
-text_gen = TextGen(**LLM_Full_Args)
-text_gen_mini = TextGen(**LLM_Small_Args)
-# 创建记忆管理器
-memory_manager = MemoryManager(**MM_Args)
-memory_manager.load_from_file(Common_Args.get("MemoryFile", "memory/memory_graph"))
-# 加载人格
-avatar = Avatar(Character)
-
-log("INFO", "System", "Components initialized successfully.")
-
-log("INFO", "System", f"Loaded character: \n\n{avatar.get_summary()}\n")
-
-# generating Prompts:
-Avatar_prompt = text_gen.generate(
-    messages=[
-        {
-            "role": "system",
-            "content": Prompts.get(
-                "Avatar_Gen",
-                r"""Create a first-person character prompt using the provided profile. Structure it as a direct AI instruction set with these elements:
+# 生成人格提示词的默认系统提示（可在配置 Prompts.Avatar_Gen 中覆盖）
+AVATAR_GEN_PROMPT = r"""Create a first-person character prompt using the provided profile. Structure it as a direct AI instruction set with these elements:
 
 1. **Immersive Self-Declaration** (Replace "You are..." with lived experience):
    "Growing up in [Birthplace] taught me..." 
@@ -76,43 +48,7 @@ Prohibited:
 - Narrative descriptions
 - Explanatory author notes
 - "You should..." directives
-""",
-            ),
-        },
-        {
-            "role": "user",
-            "content": avatar.get_summary(),
-        }
-    ]
-)
-
-log("INFO", "System", f"Generated Avatar Prompt: \n{Avatar_prompt}")
-
-# ***************************************************************************************************
-
-# todo: Load character personality
-
-# 2. loop: run main loop
-# 2.1. get speech recognition result
-# 2.2. check if user needs assistance
-# 2.3. process user input(if needed), read screen(if needed), opencv camera(if needed) and generate response
-
-speech_history = ""
-
-reg_LLM = None
-if text_gen_mini.support_regex_limitation():
-    reg_LLM = text_gen_mini
-elif text_gen.support_regex_limitation():
-    reg_LLM = text_gen
-else:
-    log("WARNING", "System", "No LLM support regex limitation, some features may not work.")
-
-
-
-while True:
-    new_speech = speech_recog.transcribe()  # type: ignore
-    print(new_speech)
-    speech_history += new_speech  # type: ignore
+"""
 
 
 def main():
@@ -123,6 +59,9 @@ def main():
         "有什么我可以帮你的吗？",
     ]
 
+    # 预先批量合成并缓存示例对话
+    voice_gen.prewarm(dialogues)
+
     # 播放对话
     for text in dialogues:
         # 播放说话动作（假设模型中有"Talk"动作）
@@ -135,9 +74,102 @@ def main():
         time.sleep(1.0)
 
     # 关闭所有组件
+    voice_gen.close()
     lip_sync.stop()
     displayer.close()
 
 
+# 多进程推理（spawn）的子进程会重新导入本脚本，启动流程必须放在入口保护之内
 if __name__ == "__main__":
-    main()
+    # 1. initialize: Display Live2D model, run subthreads, load memory
+
+    # 创建口型同步接口
+    lip_sync = LipSyncInterface()
+    lip_sync.start()
+
+    # 创建显示组件
+    displayer = Displayer(lip_sync_interface=lip_sync, **Display_Args)
+
+    # ***************************************************************************************************
+
+    # 创建语音生成器
+    voice_gen = AudioGen(lip_sync_interface=lip_sync, **Audio_Args)
+    # 创建语音识别器
+    speech_recog = SpeechRecog(**SpeechRecog_Args)
+    # 创建文本生成器
+    text_gen = TextGen(**LLM_Full_Args)
+    text_gen_mini = TextGen(**LLM_Small_Args)
+    # 创建记忆管理器
+    memory_manager = MemoryManager(**MM_Args)
+    memory_manager.load_from_file(Common_Args.get("MemoryFile", "memory/memory_graph"))
+    # 加载人格
+    avatar = Avatar(Character)
+
+    # 用户开始说话时打断正在播放的语音（没有回声消除时扬声器播放的语音也会触发 VAD，默认关闭，建议佩戴耳机时开启）
+    if SpeechRecog_Args.get("barge_in", False):
+        speech_recog.register_voice_activity_callback(voice_gen.cancel)
+
+    log("INFO", "System", "Components initialized successfully.")
+
+    log("INFO", "System", f"Loaded character: \n\n{avatar.get_summary()}\n")
+
+    # generating Prompts:
+    Avatar_prompt = text_gen.generate(
+        messages=[
+            {
+                "role": "system",
+                "content": Prompts.get(
+                    "Avatar_Gen",
+                    AVATAR_GEN_PROMPT,
+                ),
+            },
+            {
+                "role": "user",
+                "content": avatar.get_summary(),
+            }
+        ]
+    )
+
+    log("INFO", "System", f"Generated Avatar Prompt: \n{Avatar_prompt}")
+
+    # ***************************************************************************************************
+
+    # todo: Load character personality
+
+    # 2. loop: run main loop
+    # 2.1. get speech recognition result
+    # 2.2. check if user needs assistance
+    # 2.3. process user input(if needed), read screen(if needed), opencv camera(if needed) and generate response
+
+    speech_history = ""
+
+    reg_LLM = None
+    if text_gen_mini.support_regex_limitation():
+        reg_LLM = text_gen_mini
+    elif text_gen.support_regex_limitation():
+        reg_LLM = text_gen
+    else:
+        log("WARNING", "System", "No LLM support regex limitation, some features may not work.")
+
+
+
+    if "--demo" in sys.argv:
+        # python main.py --demo：预先合成并播放示例对话后退出
+        main()
+        sys.exit(0)
+
+    try:
+        while True:
+            # 阻塞等待新的识别结果，没有语音时主循环不占用CPU
+            for result in speech_recog.transcribe():
+                if result["type"] != "final":
+                    continue
+                print(result["text"])
+                speech_history += result["text"]
+    except KeyboardInterrupt:
+        log("INFO", "System", "Stopped by user.")
+    finally:
+        # 关闭所有组件
+        voice_gen.close()
+        lip_sync.stop()
+        displayer.close()
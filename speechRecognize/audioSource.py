@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+import os
+import sys
+import wave
+from typing import BinaryIO, List, Optional
+import numpy as np
+
+
+class AudioSource:
+    """音频输入源基类：read() 返回 int16 单声道音频块，输入结束时返回 None"""
+
+    # 实时源（麦克风）按采样率产生数据；非实时源以 CPU 允许的最快速度读取
+    realtime: bool = False
+
+    def __init__(self, sample_rate: int = 16000):
+        self.sample_rate = sample_rate
+
+    def open(self):
+        pass
+
+    def read(self, frames: int) -> Optional[np.ndarray]:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MicrophoneSource(AudioSource):
+    """PyAudio 麦克风输入"""
+
+    realtime = True
+
+    def __init__(self, sample_rate: int = 16000, chunk_size: int = 1024):
+        super().__init__(sample_rate)
+        self.chunk_size = chunk_size
+        self.p = None
+        self.stream = None
+
+    def open(self):
+        import pyaudio
+
+        self.p = pyaudio.PyAudio()
+        self.stream = self.p.open(format=pyaudio.paInt16,
+                                  channels=1,
+                                  rate=self.sample_rate,
+                                  input=True,
+                                  frames_per_buffer=self.chunk_size)
+
+    def read(self, frames: int) -> Optional[np.ndarray]:
+        data = self.stream.read(frames, exception_on_overflow=False) # type: ignore
+        return np.frombuffer(data, dtype=np.int16)
+
+    def close(self):
+        if self.stream:
+            self.stream.stop_stream()
+            self.stream.close()
+        if self.p:
+            self.p.terminate()
+
+
+def load_wav(path: str, sample_rate: int) -> np.ndarray:
+    """读取 WAV 文件并转换为指定采样率的 int16 单声道音频"""
+    with wave.open(path, "rb") as wf:
+        channels = wf.getnchannels()
+        width = wf.getsampwidth()
+        rate = wf.getframerate()
+        data = wf.readframes(wf.getnframes())
+
+    if width == 2:
+        audio = np.frombuffer(data, dtype="<i2").astype(np.float32)
+    elif width == 4:
+        audio = np.frombuffer(data, dtype="<i4").astype(np.float32) / 65536.0
+    elif width == 1:
+        audio = (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128.0) * 256.0
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {width} bytes ({path})")
+
+    if channels > 1:
+        audio = audio.reshape(-1, channels).mean(axis=1)
+    if rate != sample_rate and len(audio) > 0:
+        # 线性插值重采样，足以满足语音识别需求
+        n_out = int(round(len(audio) * sample_rate / rate))
+        audio = np.interp(np.arange(n_out) * (rate / sample_rate), np.arange(len(audio)), audio)
+    return np.clip(audio, -32768, 32767).astype(np.int16)
+
+
+class WavFileSource(AudioSource):
+    """单个 WAV 文件输入"""
+
+    def __init__(self, path: str, sample_rate: int = 16000):
+        super().__init__(sample_rate)
+        self.path = path
+        self.audio = np.zeros(0, dtype=np.int16)
+        self.position = 0
+
+    def open(self):
+        self.audio = load_wav(self.path, self.sample_rate)
+        self.position = 0
+
+    def read(self, frames: int) -> Optional[np.ndarray]:
+        if self.position >= len(self.audio):
+            return None
+        chunk = self.audio[self.position:self.position + frames]
+        self.position += frames
+        return chunk
+
+
+class DirectorySource(AudioSource):
+    """目录中的所有 WAV 文件依次输入，文件之间插入静音以便切分句子"""
+
+    def __init__(self, directory: str, sample_rate: int = 16000, gap: float = 1.0):
+        super().__init__(sample_rate)
+        self.files: List[str] = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory) if name.lower().endswith(".wav")
+        )
+        self.gap = np.zeros(int(gap * sample_rate), dtype=np.int16)
+        self.current: Optional[WavFileSource] = None
+        self.index = 0
+        self.gap_position = 0
+
+    def read(self, frames: int) -> Optional[np.ndarray]:
+        while True:
+            if self.current is not None:
+                chunk = self.current.read(frames)
+                if chunk is not None:
+                    return chunk
+                if self.gap_position < len(self.gap):
+                    chunk = self.gap[self.gap_position:self.gap_position + frames]
+                    self.gap_position += frames
+                    return chunk
+                self.current = None
+            if self.index >= len(self.files):
+                return None
+            self.current = WavFileSource(self.files[self.index], self.sample_rate)
+            self.current.open()
+            self.index += 1
+            self.gap_position = 0
+
+
+class PCMPipeSource(AudioSource):
+    """原始 PCM 输入（s16le 单声道，采样率与识别系统一致），来自标准输入、命名管道或文件"""
+
+    def __init__(self, path: Optional[str] = None, sample_rate: int = 16000):
+        super().__init__(sample_rate)
+        self.path = path
+        self.file: Optional[BinaryIO] = None
+
+    def open(self):
+        self.file = open(self.path, "rb") if self.path else sys.stdin.buffer
+
+    def read(self, frames: int) -> Optional[np.ndarray]:
+        data = self.file.read(frames * 2) # type: ignore
+        if not data:
+            return None
+        if len(data) % 2:
+            data = data[:-1]
+        return np.frombuffer(data, dtype="<i2").astype(np.int16)
+
+    def close(self):
+        if self.file is not None and self.path:
+            self.file.close()
+
+
+def create_audio_source(input_source: Optional[str] = None, sample_rate: int = 16000, chunk_size: int = 1024) -> AudioSource:
+    """根据配置创建音频输入源：
+    None / "mic"        麦克风
+    "-" / "pipe:"       标准输入的原始 PCM
+    "pipe:<路径>"        命名管道或文件中的原始 PCM
+    目录                 目录中的所有 WAV 文件
+    *.wav               单个 WAV 文件
+    其他文件             原始 PCM 文件
+    """
+    if input_source is None or input_source.lower() in ("mic", "microphone"):
+        return MicrophoneSource(sample_rate, chunk_size)
+    if input_source in ("-", "pipe:"):
+        return PCMPipeSource(None, sample_rate)
+    if input_source.startswith("pipe:"):
+        return PCMPipeSource(input_source[len("pipe:"):], sample_rate)
+    if os.path.isdir(input_source):
+        return DirectorySource(input_source, sample_rate)
+    if not os.path.exists(input_source):
+        raise ValueError(f"Audio input source not found: {input_source}")
+    if input_source.lower().endswith(".wav"):
+        return WavFileSource(input_source, sample_rate)
+    return PCMPipeSource(input_source, sample_rate)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+import queue
+from typing import Any, Callable, Literal, Optional
+
+OverflowPolicy = Literal["drop_oldest", "drop_newest", "merge", "block"]
+
+
+class BoundedQueue(queue.Queue):
+    """有界队列，队列满时按策略处理新元素，并统计丢弃/合并次数与最高水位。
+
+    drop_oldest  丢弃队首最旧的元素
+    drop_newest  丢弃新放入的元素
+    merge        用 merge_fn 将新元素与队尾元素合并；merge_fn 返回 None 时退回 drop_oldest
+    block        阻塞等待（与 queue.Queue 行为一致），用于不允许丢数据的回放输入
+    """
+
+    def __init__(self, maxsize: int = 0, policy: OverflowPolicy = "drop_oldest", merge_fn: Optional[Callable[[Any, Any], Any]] = None):
+        super().__init__(maxsize)
+        if policy not in ("drop_oldest", "drop_newest", "merge", "block"):
+            raise ValueError(f"Unknown queue overflow policy: {policy}")
+        self.policy = policy
+        self.merge_fn = merge_fn
+        self.put_count = 0
+        self.dropped = 0
+        self.merged = 0
+        self.high_water = 0
+
+    def _drop_queued(self):
+        """丢弃队首元素，并同步未完成任务计数"""
+        self.queue.popleft()
+        self.dropped += 1
+        self.unfinished_tasks -= 1
+        if self.unfinished_tasks == 0:
+            self.all_tasks_done.notify_all()
+
+    def put(self, item, block=True, timeout=None):
+        if self.policy == "block" or self.maxsize <= 0:
+            super().put(item, block, timeout)
+            with self.mutex:
+                self.put_count += 1
+                self.high_water = max(self.high_water, self._qsize())
+            return
+
+        with self.not_full:
+            self.put_count += 1
+            if self._qsize() >= self.maxsize:
+                if self.policy == "drop_newest":
+                    self.dropped += 1
+                    return
+                if self.policy == "merge" and self.merge_fn is not None:
+                    merged = self.merge_fn(self.queue[-1], item)
+                    if merged is not None:
+                        self.queue[-1] = merged
+                        self.merged += 1
+                        return
+                self._drop_queued()
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.high_water = max(self.high_water, self._qsize())
+            self.not_empty.notify()
+
+    def get_stats(self) -> dict:
+        with self.mutex:
+            return {
+                "size": self._qsize(),
+                "maxsize": self.maxsize,
+                "policy": self.policy,
+                "put": self.put_count,
+                "dropped": self.dropped,
+                "merged": self.merged,
+                "high_water": self.high_water,
+            }
@@ -1,15 +1,48 @@
 #!/usr/bin/env python3
-from typing import Dict, Type
+from typing import AsyncIterator, Callable, Dict, List, Optional, Protocol, Type
 
 SpeechRecog_Dict: Dict[str, Type] = {}
 
+
+class SpeechRecognizer(Protocol):
+    """语音识别器需要实现的接口"""
+
+    def transcribe(self, timeout: Optional[float] = None) -> List[dict]:
+        """阻塞直到有新的识别结果或超时，返回结果列表（timeout=0 时立即返回）"""
+        ...
+
+    def register_callback(self, callback: Callable[[dict], None]) -> None:
+        """注册识别结果回调"""
+        ...
+
+    def unregister_callback(self, callback: Callable[[dict], None]) -> None:
+        """注销识别结果回调"""
+        ...
+
+    def register_voice_activity_callback(self, callback: Callable[[], None]) -> None:
+        """注册语音开始回调（用户开始说话时调用）"""
+        ...
+
+    def unregister_voice_activity_callback(self, callback: Callable[[], None]) -> None:
+        """注销语音开始回调"""
+        ...
+
+    def __aiter__(self) -> AsyncIterator[dict]:
+        """异步迭代识别结果"""
+        ...
+
+    def get_queue_stats(self) -> dict:
+        """音频队列与结果队列的丢弃/合并计数与最高水位"""
+        ...
+
+
 def SpeechRecogType(keyword: str):
     def decorator(cls: Type) -> Type:
         SpeechRecog_Dict[keyword.lower()] = cls
         return cls
     return decorator
 
-def SpeechRecog(**kwargs) -> Type:
+def SpeechRecog(**kwargs) -> SpeechRecognizer:
     type = kwargs.get("type", "").lower()
     if type not in SpeechRecog_Dict:
         raise ValueError(f"Unknown speech recognition type: {type}")
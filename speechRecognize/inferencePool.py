@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+import os
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List
+import numpy as np
+import torch
+import whisper
+
+# 子进程中的模型实例（由 _init_worker 加载）
+_worker_model = None
+
+
+def decode_batch(model, segments: List[np.ndarray], language: str = "zh", no_speech_threshold: float = 0.6,
+                 logprob_threshold: float = -1.0) -> List[str]:
+    """将多个 int16 音频段填充为一个 mel 批次后一次性解码，超过 30 秒的音频段回退到 transcribe"""
+    texts: List[str] = [""] * len(segments)
+    audios = [segment.astype(np.float32) / 32768.0 for segment in segments]
+    short = [i for i, audio in enumerate(audios) if len(audio) <= whisper.audio.N_SAMPLES]
+
+    if short:
+        mels = torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(audios[i]), n_mels=model.dims.n_mels)
+            for i in short
+        ]).to(model.device)
+        options = whisper.DecodingOptions(
+            language=language,
+            fp16=model.device.type != "cpu",
+            without_timestamps=True,
+        )
+        results = whisper.decode(model, mels, options)
+        for i, result in zip(short, results): # type: ignore
+            # 与 transcribe 一致：仅当判定为非语音且平均对数概率也偏低时才丢弃（避免丢掉“嗯”之类的短句）
+            if result.no_speech_prob > no_speech_threshold and result.avg_logprob < logprob_threshold:
+                continue
+            texts[i] = result.text.strip()
+
+    for i, audio in enumerate(audios):
+        if len(audio) > whisper.audio.N_SAMPLES:
+            texts[i] = model.transcribe(audio, language=language)["text"].strip() # type: ignore
+
+    return texts
+
+
+def _init_worker(model_size: str, num_threads: int):
+    """子进程初始化：限制线程数并加载独立的 CPU 模型"""
+    global _worker_model
+    torch.set_num_threads(num_threads)
+    _worker_model = whisper.load_model(model_size, device="cpu")
+
+
+def _worker_decode(segments: List[np.ndarray], language: str) -> List[str]:
+    return decode_batch(_worker_model, segments, language)
+
+
+class WhisperInferencePool:
+    """Whisper 推理池：单进程时在后台线程中使用共享模型，多进程时每个 CPU 进程加载一份模型"""
+
+    def __init__(self, whisper_model, model_lock: threading.Lock, model_size: str = "base", num_workers: int = 1, language: str = "zh"):
+        self.whisper_model = whisper_model
+        self.model_lock = model_lock
+        self.language = language
+        self.num_workers = max(1, num_workers)
+
+        if self.num_workers > 1:
+            threads = max(1, (os.cpu_count() or 1) // self.num_workers)
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(model_size, threads),
+            )
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def _decode_local(self, segments: List[np.ndarray]) -> List[str]:
+        with self.model_lock:
+            return decode_batch(self.whisper_model, segments, self.language)
+
+    def submit(self, segments: List[np.ndarray]) -> Future:
+        """提交一个批次，返回结果为文本列表的 Future"""
+        if self.num_workers > 1:
+            return self.executor.submit(_worker_decode, segments, self.language)
+        return self.executor.submit(self._decode_local, segments)
+
+    def shutdown(self, wait: bool = True):
+        """关闭推理池"""
+        self.executor.shutdown(wait=wait, cancel_futures=not wait)
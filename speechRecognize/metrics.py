@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+import threading
+import time
+from collections import deque
+from typing import Dict
+import numpy as np
+
+
+class RecognitionStats:
+    """识别吞吐统计：实时率、各阶段耗时与每秒切分段数"""
+
+    def __init__(self, sample_rate: int = 16000, window: int = 1000):
+        self.sample_rate = sample_rate
+        self.window = window
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.start_time = time.perf_counter()
+            self.end_time = None
+            self.audio_samples = 0
+            self.segments = 0
+            self.results = 0
+            self.stage_totals: Dict[str, float] = {}
+            self.stage_counts: Dict[str, int] = {}
+            self.stage_recent: Dict[str, deque] = {}
+
+    def add_audio(self, n_samples: int):
+        with self.lock:
+            self.audio_samples += n_samples
+
+    def add_segments(self, count: int = 1):
+        with self.lock:
+            self.segments += count
+
+    def add_results(self, count: int = 1):
+        with self.lock:
+            self.results += count
+
+    def record(self, stage: str, seconds: float):
+        """记录某一阶段的一次耗时"""
+        with self.lock:
+            self.stage_totals[stage] = self.stage_totals.get(stage, 0.0) + seconds
+            self.stage_counts[stage] = self.stage_counts.get(stage, 0) + 1
+            if stage not in self.stage_recent:
+                self.stage_recent[stage] = deque(maxlen=self.window)
+            self.stage_recent[stage].append(seconds)
+
+    def finish(self):
+        """标记输入处理完毕，停止计时"""
+        with self.lock:
+            self.end_time = time.perf_counter()
+
+    def report(self) -> dict:
+        with self.lock:
+            wall = (self.end_time or time.perf_counter()) - self.start_time
+            audio_seconds = self.audio_samples / self.sample_rate
+            stages = {}
+            for stage, count in self.stage_counts.items():
+                recent = np.fromiter(self.stage_recent[stage], dtype=np.float64)
+                stages[stage] = {
+                    "count": count,
+                    "mean_ms": self.stage_totals[stage] / count * 1000.0,
+                    "p50_ms": float(np.percentile(recent, 50)) * 1000.0,
+                    "p95_ms": float(np.percentile(recent, 95)) * 1000.0,
+                    "max_ms": float(recent.max()) * 1000.0,
+                }
+            return {
+                "wall_seconds": wall,
+                "audio_seconds": audio_seconds,
+                # 实时率：处理耗时 / 音频时长，小于 1 表示快于实时
+                "real_time_factor": wall / audio_seconds if audio_seconds > 0 else 0.0,
+                "segments": self.segments,
+                "results": self.results,
+                "segments_per_sec": self.segments / wall if wall > 0 else 0.0,
+                "stages": stages,
+            }
+
+    def format_report(self) -> str:
+        report = self.report()
+        lines = [
+            f"audio={report['audio_seconds']:.1f}s wall={report['wall_seconds']:.1f}s "
+            f"RTF={report['real_time_factor']:.3f} segments={report['segments']} "
+            f"results={report['results']} segments/sec={report['segments_per_sec']:.2f}"
+        ]
+        for stage, s in report["stages"].items():
+            lines.append(
+                f"  {stage:<12} n={s['count']:<6} mean={s['mean_ms']:8.2f}ms "
+                f"p50={s['p50_ms']:8.2f}ms p95={s['p95_ms']:8.2f}ms max={s['max_ms']:8.2f}ms"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+import threading
+import numpy as np
+
+
+class AudioRingBuffer:
+    """固定容量的 int16 环形缓冲区，避免录音时反复 np.append 造成的整段拷贝。"""
+
+    def __init__(self, capacity: int, dtype=np.int16):
+        if capacity <= 0:
+            raise ValueError("Ring buffer capacity must be positive.")
+        self.capacity = int(capacity)
+        self._data = np.zeros(self.capacity, dtype=dtype)
+        self._start = 0  # 最旧样本所在位置
+        self._size = 0  # 当前有效样本数
+        self.overrun_samples = 0  # 因容量不足被覆盖的样本数
+        self.lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def clear(self):
+        """清空缓冲区（不释放内存）"""
+        with self.lock:
+            self._start = 0
+            self._size = 0
+
+    def write(self, chunk: np.ndarray):
+        """写入音频块，容量不足时覆盖最旧的样本"""
+        chunk = np.asarray(chunk, dtype=self._data.dtype).reshape(-1)
+        n = len(chunk)
+        if n == 0:
+            return
+        with self.lock:
+            if n >= self.capacity:
+                # 单块超过容量，只保留末尾部分
+                self.overrun_samples += self._size + n - self.capacity
+                self._data[:] = chunk[-self.capacity:]
+                self._start = 0
+                self._size = self.capacity
+                return
+
+            overflow = self._size + n - self.capacity
+            if overflow > 0:
+                self._start = (self._start + overflow) % self.capacity
+                self._size -= overflow
+                self.overrun_samples += overflow
+
+            end = (self._start + self._size) % self.capacity
+            first = min(n, self.capacity - end)
+            self._data[end:end + first] = chunk[:first]
+            if first < n:
+                self._data[:n - first] = chunk[first:]
+            self._size += n
+
+    def peek(self, count: int = -1, from_end: bool = False) -> np.ndarray:
+        """读取数据但不移除：数据连续时返回视图，跨越边界时返回一次拷贝"""
+        with self.lock:
+            if count < 0 or count > self._size:
+                count = self._size
+            offset = self._size - count if from_end else 0
+            begin = (self._start + offset) % self.capacity
+            if begin + count <= self.capacity:
+                return self._data[begin:begin + count]
+            split = self.capacity - begin
+            return np.concatenate((self._data[begin:], self._data[:count - split]))
+
+    def pop(self, count: int = -1) -> np.ndarray:
+        """取出最旧的 count 个样本（返回独立拷贝，可安全跨线程传递）"""
+        with self.lock:
+            segment = self.peek(count)
+            if np.shares_memory(segment, self._data):
+                segment = segment.copy()
+            self.discard(len(segment))
+            return segment
+
+    def discard(self, count: int):
+        """丢弃最旧的 count 个样本"""
+        with self.lock:
+            count = min(max(count, 0), self._size)
+            self._start = (self._start + count) % self.capacity
+            self._size -= count
+            if self._size == 0:
+                self._start = 0
+
+
+def benchmark(duration: float = 90.0, sample_rate: int = 16000, chunk_size: int = 1024):
+    """对比 np.append 与环形缓冲区的逐块写入耗时"""
+    import time
+
+    chunk = (np.random.randn(chunk_size) * 1000).astype(np.int16)
+    n_chunks = int(duration * sample_rate / chunk_size)
+    report_every = int(10 * sample_rate / chunk_size)
+
+    def run(name, write):
+        costs = np.empty(n_chunks)
+        for i in range(n_chunks):
+            t0 = time.perf_counter()
+            write(chunk)
+            costs[i] = time.perf_counter() - t0
+        print(f"[{name}] per-chunk cost (us) every 10 s of audio:")
+        for start in range(0, n_chunks, report_every):
+            window = costs[start:start + report_every]
+            print(f"  {start * chunk_size / sample_rate:6.1f}s  mean={window.mean() * 1e6:8.2f}  max={window.max() * 1e6:8.2f}")
+        print(f"  total={costs.sum() * 1e3:.2f} ms")
+
+    state = {"buffer": np.array([], dtype=np.int16)}
+
+    def append_write(c):
+        state["buffer"] = np.append(state["buffer"], c)
+
+    ring = AudioRingBuffer(int((duration + 1) * sample_rate))
+    run("np.append", append_write)
+    run("AudioRingBuffer", ring.write)
+
+
+if __name__ == "__main__":
+    # python -m speechRecognize.ringBuffer
+    benchmark()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+import json
+import os
+import threading
+from typing import List, Optional, Tuple
+import numpy as np
+
+# 索引文件格式：int32 头 [MAGIC, 维度]，随后是追加写入的定长记录。
+# 同一说话人的多条记录中，以最后一条为准。
+INDEX_MAGIC = 0x53504B31  # "SPK1"
+HEADER_BYTES = 8
+
+
+def _record_dtype(dim: int) -> np.dtype:
+    return np.dtype([("id", "<i4"), ("count", "<i4"), ("centroid", "<f4", (dim,))])
+
+
+class SpeakerIndex:
+    """基于连续 float32 归一化矩阵的说话人索引，一次矩阵乘法完成余弦相似度检索。"""
+
+    def __init__(self, index_file: str = "speaker_db.idx", legacy_json_file: Optional[str] = "speaker_db.json", compact_ratio: float = 4.0):
+        self.index_file = index_file
+        self.compact_ratio = compact_ratio
+        self.lock = threading.RLock()
+
+        self.dim = 0
+        self._size = 0
+        self._ids = np.zeros(0, dtype=np.int32)
+        self._counts = np.zeros(0, dtype=np.int32)
+        self._centroids = np.zeros((0, 0), dtype=np.float32)  # 未归一化的在线均值
+        self._matrix = np.zeros((0, 0), dtype=np.float32)  # 归一化后的检索矩阵
+        self._row_of = {}
+        self._records_on_disk = 0
+
+        if os.path.exists(self.index_file):
+            self._load()
+        elif legacy_json_file and os.path.exists(legacy_json_file):
+            self._import_legacy_json(legacy_json_file)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def next_speaker_id(self) -> int:
+        return int(self._ids[:self._size].max()) + 1 if self._size else 1
+
+    def _ensure_capacity(self, dim: int, needed: int):
+        """按需倍增矩阵容量，保证数据始终连续存放"""
+        if self.dim == 0:
+            self.dim = dim
+        elif dim != self.dim:
+            raise ValueError(f"Feature dimension mismatch: expected {self.dim}, got {dim}")
+
+        capacity = len(self._ids)
+        if needed <= capacity:
+            return
+        new_capacity = max(16, capacity * 2, needed)
+        ids = np.zeros(new_capacity, dtype=np.int32)
+        counts = np.zeros(new_capacity, dtype=np.int32)
+        centroids = np.zeros((new_capacity, self.dim), dtype=np.float32)
+        matrix = np.zeros((new_capacity, self.dim), dtype=np.float32)
+        ids[:self._size] = self._ids[:self._size]
+        counts[:self._size] = self._counts[:self._size]
+        if self._size:
+            centroids[:self._size] = self._centroids[:self._size]
+            matrix[:self._size] = self._matrix[:self._size]
+        self._ids, self._counts, self._centroids, self._matrix = ids, counts, centroids, matrix
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _set_row(self, row: int, speaker_id: int, count: int, centroid: np.ndarray):
+        self._ids[row] = speaker_id
+        self._counts[row] = count
+        self._centroids[row] = centroid
+        self._matrix[row] = self._normalize(centroid)
+        self._row_of[speaker_id] = row
+
+    def search(self, features: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """对一条或多条特征做 top-k 余弦检索，返回 (说话人ID, 相似度)，形状均为 (查询数, k)"""
+        queries = self._normalize(np.atleast_2d(np.asarray(features, dtype=np.float32)))
+        with self.lock:
+            if self._size == 0:
+                empty = np.zeros((len(queries), 0))
+                return empty.astype(np.int32), empty.astype(np.float32)
+            similarities = queries @ self._matrix[:self._size].T
+            k = min(k, self._size)
+            top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+            top_sims = np.take_along_axis(similarities, top, axis=1)
+            order = np.argsort(-top_sims, axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+            return self._ids[top], np.take_along_axis(top_sims, order, axis=1)
+
+    def enroll(self, features: np.ndarray) -> int:
+        """注册新说话人并返回其ID"""
+        features = np.asarray(features, dtype=np.float32).reshape(-1)
+        with self.lock:
+            speaker_id = self.next_speaker_id
+            self._ensure_capacity(len(features), self._size + 1)
+            self._set_row(self._size, speaker_id, 1, features)
+            self._size += 1
+            self._append_records([self._size - 1])
+            return speaker_id
+
+    def update(self, speaker_id: int, features: np.ndarray):
+        """用新的语音特征在线更新说话人质心"""
+        features = np.asarray(features, dtype=np.float32).reshape(-1)
+        with self.lock:
+            row = self._row_of[speaker_id]
+            count = int(self._counts[row]) + 1
+            centroid = self._centroids[row] + (features - self._centroids[row]) / count
+            self._set_row(row, speaker_id, count, centroid)
+            self._append_records([row])
+
+    def identify_or_enroll(self, features: np.ndarray, threshold: float = 0.7) -> int:
+        """识别说话人；相似度低于阈值时注册为新说话人"""
+        with self.lock:
+            ids, sims = self.search(features, k=1)
+            if ids.shape[1] == 0 or sims[0, 0] < threshold:
+                return self.enroll(features)
+            speaker_id = int(ids[0, 0])
+            self.update(speaker_id, features)
+            return speaker_id
+
+    def identify_or_enroll_batch(self, features: np.ndarray, threshold: float = 0.7) -> List[int]:
+        """批量识别：一次矩阵乘法完成检索，未匹配的条目再逐条注册"""
+        features = np.atleast_2d(np.asarray(features, dtype=np.float32))
+        with self.lock:
+            ids, sims = self.search(features, k=1)
+            speaker_ids = []
+            for i, row in enumerate(features):
+                if ids.shape[1] and sims[i, 0] >= threshold:
+                    speaker_id = int(ids[i, 0])
+                    self.update(speaker_id, row)
+                else:
+                    # 可能与本批中刚注册的说话人相同，需要重新检索
+                    speaker_id = self.identify_or_enroll(row, threshold)
+                speaker_ids.append(speaker_id)
+            return speaker_ids
+
+    def _write_header(self, f):
+        np.array([INDEX_MAGIC, self.dim], dtype="<i4").tofile(f)
+
+    def _append_records(self, rows: List[int]):
+        """以追加方式持久化记录，不再整体重写数据库"""
+        records = np.zeros(len(rows), dtype=_record_dtype(self.dim))
+        records["id"] = self._ids[rows]
+        records["count"] = self._counts[rows]
+        records["centroid"] = self._centroids[rows]
+        new_file = not os.path.exists(self.index_file)
+        with open(self.index_file, "ab") as f:
+            if new_file:
+                self._write_header(f)
+            records.tofile(f)
+        self._records_on_disk += len(rows)
+        if self._records_on_disk > self.compact_ratio * self._size + 64:
+            self.compact()
+
+    def compact(self):
+        """将索引文件压缩为每个说话人一条记录"""
+        with self.lock:
+            tmp_file = self.index_file + ".tmp"
+            records = np.zeros(self._size, dtype=_record_dtype(self.dim))
+            records["id"] = self._ids[:self._size]
+            records["count"] = self._counts[:self._size]
+            records["centroid"] = self._centroids[:self._size]
+            with open(tmp_file, "wb") as f:
+                self._write_header(f)
+                records.tofile(f)
+            os.replace(tmp_file, self.index_file)
+            self._records_on_disk = self._size
+
+    def _load(self):
+        """通过内存映射读取索引文件，每个说话人取最后一条记录"""
+        header = np.fromfile(self.index_file, dtype="<i4", count=2)
+        if len(header) < 2 or header[0] != INDEX_MAGIC:
+            raise ValueError(f"Invalid speaker index file: {self.index_file}")
+        dim = int(header[1])
+        dtype = _record_dtype(dim)
+        n_records = (os.path.getsize(self.index_file) - HEADER_BYTES) // dtype.itemsize
+        if n_records <= 0:
+            self.dim = dim
+            return
+        records = np.memmap(self.index_file, dtype=dtype, mode="r", offset=HEADER_BYTES, shape=(n_records,))
+        ids = np.asarray(records["id"])
+        _, last_from_end = np.unique(ids[::-1], return_index=True)
+        latest = np.sort(n_records - 1 - last_from_end)
+        self._ensure_capacity(dim, len(latest))
+        for row, record in enumerate(records[latest]):
+            self._set_row(row, int(record["id"]), int(record["count"]), np.asarray(record["centroid"]))
+        self._size = len(latest)
+        self._records_on_disk = n_records
+        del records
+
+    def _import_legacy_json(self, json_file: str):
+        """从旧版 speaker_db.json 迁移说话人"""
+        with open(json_file, "r") as f:
+            legacy = {int(k): np.asarray(v, dtype=np.float32) for k, v in json.load(f).items()}
+        if not legacy:
+            return
+        with self.lock:
+            for speaker_id, features in sorted(legacy.items()):
+                self._ensure_capacity(len(features), self._size + 1)
+                self._set_row(self._size, speaker_id, 1, features)
+                self._size += 1
+            self.compact()
+
+
+def benchmark(dim: int = 136, sizes=(10, 100, 500, 1000), repeats: int = 2000):
+    """测量不同注册人数下的单次识别耗时"""
+    import tempfile
+    import time
+
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            index = SpeakerIndex(os.path.join(tmp, "bench.idx"), legacy_json_file=None)
+            for vector in np.random.randn(size, dim).astype(np.float32):
+                index.enroll(vector)
+            query = np.random.randn(dim).astype(np.float32)
+            t0 = time.perf_counter()
+            for _ in range(repeats):
+                index.search(query, k=3)
+            elapsed = (time.perf_counter() - t0) / repeats
+            print(f"[SpeakerIndex] {size:5d} speakers: {elapsed * 1e6:8.2f} us per lookup")
+
+
+if __name__ == "__main__":
+    # python -m speechRecognize.speakerIndex
+    benchmark()
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+import os
+from typing import Tuple
+
+
+class StablePrefixTracker:
+    """流式识别的稳定前缀提交：连续两次解码结果一致的前缀才被提交，已提交文本不再回退。"""
+
+    def __init__(self):
+        self.committed = ""
+        self.previous = ""
+
+    def reset(self):
+        """开始新的一句话"""
+        self.committed = ""
+        self.previous = ""
+
+    def update(self, hypothesis: str) -> Tuple[str, str]:
+        """输入最新解码结果，返回 (已提交文本, 未稳定文本)"""
+        agreed = os.path.commonprefix([self.previous, hypothesis])
+        # 含空格的文本（拉丁语系）只在单词边界处提交
+        if " " in hypothesis and len(agreed) < len(hypothesis) and not agreed.endswith(" ") and hypothesis[len(agreed)] != " ":
+            agreed = agreed[:agreed.rfind(" ") + 1]
+        if len(agreed) > len(self.committed) and agreed.startswith(self.committed):
+            self.committed = agreed
+        self.previous = hypothesis
+
+        if hypothesis.startswith(self.committed):
+            return self.committed, hypothesis[len(self.committed):]
+        # 解码结果与已提交文本不一致时，等待下一次解码重新对齐
+        return self.committed, ""
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+from collections import deque
+from typing import List, Optional, Tuple
+import numpy as np
+
+
+class FrameVAD:
+    """帧级语音活动检测：自适应噪声底 + 语音/拖尾状态机 + 预录缓冲。
+
+    process() 返回按时间顺序排列的事件列表：
+      ("start", 预录音频)  一句话开始，附带开始前的 pre_roll 音频
+      ("audio", 音频)      属于当前句子的音频（包括拖尾静音）
+      ("end", None)        拖尾静音超过 hangover，句子结束
+    非语音部分不会出现在事件中。
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_duration: float = 0.02,
+        threshold_db: float = -40.0,
+        noise_margin_db: float = 10.0,
+        noise_window: float = 5.0,
+        hangover: float = 0.5,
+        pre_roll: float = 0.3,
+        min_speech_duration: float = 0.15,
+    ):
+        self.sample_rate = sample_rate
+        self.frame_size = max(1, int(frame_duration * sample_rate))
+        self.threshold_db = threshold_db  # 绝对阈值 (dBFS)，噪声底再低也不会低于此值
+        self.noise_margin_db = noise_margin_db  # 语音需高出噪声底的分贝数
+
+        frame_duration = self.frame_size / sample_rate
+        self.hangover_frames = max(1, round(hangover / frame_duration))
+        self.min_speech_frames = max(1, round(min_speech_duration / frame_duration))
+        self.pre_roll_frames = max(0, round(pre_roll / frame_duration))
+
+        # 最近 noise_window 秒的帧能量，用最小值统计估计噪声底
+        self._energy_history = np.full(max(1, round(noise_window / frame_duration)), np.inf, dtype=np.float32)
+        self._history_pos = 0
+        self.noise_floor_db = threshold_db - noise_margin_db
+
+        self._remainder = np.zeros(0, dtype=np.int16)
+        self._pre_roll = deque(maxlen=self.pre_roll_frames + self.min_speech_frames)
+        self._speech_run = 0
+        self._silence_run = 0
+        self.in_speech = False
+
+    def reset(self):
+        """清除句子状态（保留噪声底估计）"""
+        self._remainder = np.zeros(0, dtype=np.int16)
+        self._pre_roll.clear()
+        self._speech_run = 0
+        self._silence_run = 0
+        self.in_speech = False
+
+    def frame_energy_db(self, frames: np.ndarray) -> np.ndarray:
+        """批量计算每帧能量 (dBFS)，在 float32 中计算以避免 int16 平方溢出"""
+        samples = frames.astype(np.float32) / 32768.0
+        power = np.einsum("ij,ij->i", samples, samples) / frames.shape[1]
+        return 10.0 * np.log10(power + 1e-10)
+
+    def _update_noise_floor(self, energies: np.ndarray):
+        n = len(energies)
+        size = len(self._energy_history)
+        if n >= size:
+            self._energy_history[:] = energies[-size:]
+            self._history_pos = 0
+        else:
+            end = self._history_pos + n
+            if end <= size:
+                self._energy_history[self._history_pos:end] = energies
+            else:
+                split = size - self._history_pos
+                self._energy_history[self._history_pos:] = energies[:split]
+                self._energy_history[:n - split] = energies[split:]
+            self._history_pos = end % size
+        floor = float(self._energy_history.min())
+        if np.isfinite(floor):
+            self.noise_floor_db = floor
+
+    def process(self, chunk: np.ndarray) -> List[Tuple[str, Optional[np.ndarray]]]:
+        """处理一个 int16 音频块，返回 VAD 事件列表"""
+        samples = np.concatenate((self._remainder, np.asarray(chunk, dtype=np.int16).reshape(-1)))
+        n_frames = len(samples) // self.frame_size
+        self._remainder = samples[n_frames * self.frame_size:]
+        if n_frames == 0:
+            return []
+
+        frames = samples[:n_frames * self.frame_size].reshape(n_frames, self.frame_size)
+        energies = self.frame_energy_db(frames)
+        self._update_noise_floor(energies)
+        threshold = max(self.threshold_db, self.noise_floor_db + self.noise_margin_db)
+        is_speech = energies > threshold
+
+        events: List[Tuple[str, Optional[np.ndarray]]] = []
+        utterance_start = None  # 当前块中属于句子的起始帧
+
+        for i in range(n_frames):
+            if not self.in_speech:
+                self._pre_roll.append(frames[i])
+                self._speech_run = self._speech_run + 1 if is_speech[i] else 0
+                if self._speech_run >= self.min_speech_frames:
+                    events.append(("start", np.concatenate(self._pre_roll)))
+                    self._pre_roll.clear()
+                    self.in_speech = True
+                    self._silence_run = 0
+                    utterance_start = i + 1
+            else:
+                if utterance_start is None:
+                    utterance_start = i
+                self._silence_run = 0 if is_speech[i] else self._silence_run + 1
+                if self._silence_run >= self.hangover_frames:
+                    events.append(("audio", frames[utterance_start:i + 1].reshape(-1)))
+                    events.append(("end", None))
+                    self.in_speech = False
+                    self._speech_run = 0
+                    utterance_start = None
+
+        if self.in_speech and utterance_start is not None and utterance_start < n_frames:
+            events.append(("audio", frames[utterance_start:].reshape(-1)))
+        return events
+
+    def flush(self) -> List[Tuple[str, Optional[np.ndarray]]]:
+        """输入结束时结束当前句子"""
+        events: List[Tuple[str, Optional[np.ndarray]]] = []
+        if self.in_speech:
+            if len(self._remainder):
+                events.append(("audio", self._remainder))
+            events.append(("end", None))
+        self.reset()
+        return events
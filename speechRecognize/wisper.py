@@ -1,186 +1,350 @@
-import os
+import asyncio
 import queue
 import threading
 import time
-from typing import Literal
-import wave
-import json
+from collections import deque
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, Callable, List, Literal, Optional
 import numpy as np
 import whisper
-from pyAudioAnalysis import audioBasicIO as aIO
 from pyAudioAnalysis import audioSegmentation as aS
-from pyAudioAnalysis import ShortTermFeatures as aF
-import pyaudio
+from pyAudioAnalysis import MidTermFeatures as aM
 from .general import SpeechRecogType
+from .ringBuffer import AudioRingBuffer
+from .speakerIndex import SpeakerIndex
+from .streaming import StablePrefixTracker
+from .inferencePool import WhisperInferencePool
+from .vad import FrameVAD
+from .audioSource import create_audio_source
+from .metrics import RecognitionStats
+from .boundedQueue import BoundedQueue
+from log import log
+
+
+def merge_segments(older: tuple, newer: tuple) -> tuple:
+    """合并相邻的两个待识别音频段，保留较早的入队时间"""
+    return (np.concatenate((older[0], newer[0])), older[1])
+
+
+def merge_results(older: dict, newer: dict) -> Optional[dict]:
+    """合并相邻的识别结果：同一说话人的最终结果拼接文本，部分结果只保留最新的一条"""
+    if older["type"] == "partial" and newer["type"] == "partial":
+        return newer
+    if older["type"] == "final" and newer["type"] == "final" and older["speaker_id"] == newer["speaker_id"]:
+        separator = " " if older["text"][-1:].isascii() and newer["text"][:1].isascii() else ""
+        return dict(older, text=older["text"] + separator + newer["text"], timestamp=newer["timestamp"])
+    return None
+
 
 class VoiceRecognitionSystem:
-    def __init__(self, model_size="base", silence_threshold=-40, min_silence_duration=0.5, sample_rate=16000):
+    def __init__(self, model_size="base", silence_threshold=-40, min_silence_duration=0.5, sample_rate=16000, max_buffer_duration=120.0, speaker_threshold=0.7, speaker_index_file="speaker_db.idx", streaming=False, stream_interval=0.5, stream_window=30.0, batch_size=4, batch_max_wait=0.1, num_workers=1, vad_frame_duration=0.02, vad_noise_margin=10.0, pre_roll=0.3, min_speech_duration=0.15, input_source=None, audio_queue_size=16, result_queue_size=64, overflow_policy="drop_oldest", result_overflow_policy="drop_oldest"):
         # 初始化参数
         self.silence_threshold = silence_threshold
         self.min_silence_duration = min_silence_duration
+        self.speaker_threshold = speaker_threshold
         self.sample_rate = sample_rate
         self.chunk_size = 1024
-        self.audio_format = pyaudio.paInt16
         self.channels = 1
+
+        # 音频输入源（None 为麦克风，也可以是 WAV 文件、目录或原始 PCM 管道）
+        self.input_source = input_source
+        self.input_finished = threading.Event()
+        self.stats = RecognitionStats(sample_rate)
+
+        # 帧级语音活动检测（silence_threshold 为绝对阈值，单位 dBFS）
+        self.vad = FrameVAD(
+            sample_rate=sample_rate,
+            frame_duration=vad_frame_duration,
+            threshold_db=silence_threshold,
+            noise_margin_db=vad_noise_margin,
+            hangover=min_silence_duration,
+            pre_roll=pre_roll,
+            min_speech_duration=min_speech_duration,
+        )
+
+        # 流式识别参数
+        self.streaming = streaming
+        self.stream_interval = stream_interval
+        self.stream_window = stream_window
+
+        # 批量推理参数
+        self.batch_size = max(1, batch_size)
+        self.batch_max_wait = batch_max_wait
         
-        # 初始化队列
-        self.audio_queue = queue.Queue()
-        self.result_queue = queue.Queue()
+        # 初始化有界队列，识别跟不上时按溢出策略丢弃或合并，避免内存无限增长
+        self.audio_queue = BoundedQueue(audio_queue_size, overflow_policy, merge_segments)
+        self.result_queue = BoundedQueue(result_queue_size, result_overflow_policy, merge_results)
+        self.result_callbacks: List[Callable[[dict], None]] = []
+        self.voice_activity_callbacks: List[Callable[[], None]] = []
         
         # 加载模型
         self.whisper_model = whisper.load_model(model_size)
+        self.model_lock = threading.Lock()  # 处理线程与流式线程共享模型
+        self.inference_pool = WhisperInferencePool(self.whisper_model, self.model_lock, model_size, num_workers)
         
-        # 说话人数据库
-        self.speaker_db_file = "speaker_db.json"
-        self.speaker_db = self.load_speaker_db()
-        self.next_speaker_id = max(self.speaker_db.keys(), default=0) + 1
+        # 说话人索引（首次运行时自动迁移旧版 speaker_db.json）
+        self.speaker_index = SpeakerIndex(speaker_index_file, legacy_json_file="speaker_db.json")
         
         # 线程控制
         self.is_running = False
         self.processing_thread = None
         self.recording_thread = None
+        self.streaming_thread = None
         
-        # 音频缓冲区
-        self.audio_buffer = np.array([], dtype=np.int16)
-        self.silence_counter = 0
+        # 音频缓冲区（预分配的环形缓冲区，超出容量时覆盖最旧的音频）
+        self.audio_buffer = AudioRingBuffer(int(max_buffer_duration * sample_rate))
         self.last_active_time = time.time()
+        self.utterance_id = 0  # 每切分出一段音频加一，用于流式线程识别新句子
 
-    def load_speaker_db(self):
-        """加载说话人数据库"""
-        if os.path.exists(self.speaker_db_file):
-            with open(self.speaker_db_file, 'r') as f:
-                return {int(k): v for k, v in json.load(f).items()}
-        return {}
-
-    def save_speaker_db(self):
-        """保存说话人数据库"""
-        with open(self.speaker_db_file, 'w') as f:
-            json.dump(self.speaker_db, f)
+    def transcribe_audio(self, audio_segment: np.ndarray, **options) -> str:
+        """使用Whisper转录 int16 音频段"""
+        audio = audio_segment.astype(np.float32) / 32768.0
+        with self.model_lock:
+            result = self.whisper_model.transcribe(audio, language="zh", **options)
+        return result["text"].strip() # type: ignore
 
     def extract_voice_features(self, audio_data):
         """提取声音特征（简化版，实际应用中应使用更复杂的声纹特征）"""
-        with wave.open('temp.wav', 'wb') as wf:
-            wf.setnchannels(self.channels)
-            wf.setsampwidth(2)  # 16-bit = 2 bytes
-            wf.setframerate(self.sample_rate)
-            wf.writeframes(audio_data.tobytes())
-        
-        # 使用pyAudioAnalysis提取基本特征
-        [fs, x] = aIO.read_audio_file('temp.wav')
-        # 使用正确的特征提取函数
-        f, f_names = aF.mid_feature_extraction(x, fs, 1, 1) # type: ignore
-        return np.mean(f, axis=1)
+        # 直接在内存中将 int16 音频段交给 pyAudioAnalysis，不再经过 temp.wav
+        x = np.asarray(audio_data, dtype=np.int16).reshape(-1)
+        short_window = int(0.050 * self.sample_rate)
+        short_step = int(0.025 * self.sample_rate)
+        if len(x) < short_window:
+            x = np.pad(x, (0, short_window - len(x)))
+        mid_window = min(len(x), self.sample_rate)  # 1 秒中期窗口
+        mid_features, _, _ = aM.mid_feature_extraction(
+            x, self.sample_rate, mid_window, mid_window, short_window, short_step
+        )
+        return np.mean(mid_features, axis=1)
+
+    def extract_voice_features_batch(self, audio_segments: List[np.ndarray]) -> np.ndarray:
+        """逐段提取声音特征并堆叠为 (段数, 特征维度) 的矩阵，供批量说话人匹配使用；
+        特征提取本身仍逐段进行（各段的中期窗口取决于段长，无法共享计算），仅为便捷封装"""
+        if not audio_segments:
+            return np.empty((0, 0), dtype=np.float32)
+        features = [self.extract_voice_features(segment) for segment in audio_segments]
+        return np.stack(features).astype(np.float32)
 
     def identify_speaker(self, audio_segment):
         """识别说话人并返回ID"""
         features = self.extract_voice_features(audio_segment)
-        
-        # 如果没有注册的说话人，创建新ID
-        if not self.speaker_db:
-            speaker_id = self.next_speaker_id
-            self.speaker_db[speaker_id] = features.tolist()
-            self.next_speaker_id += 1
-            self.save_speaker_db()
-            return speaker_id
-        
-        # 计算与已注册说话人的相似度
-        best_match_id = None
-        best_similarity = -np.inf
-        
-        for speaker_id, db_features in self.speaker_db.items():
-            similarity = np.dot(features, np.array(db_features))
-            if similarity > best_similarity:
-                best_similarity = similarity
-                best_match_id = speaker_id
-        
-        # 设置相似度阈值，低于阈值则视为新说话人
-        if best_similarity < 0.7:  # 调整此阈值
-            best_match_id = self.next_speaker_id
-            self.speaker_db[best_match_id] = features.tolist()
-            self.next_speaker_id += 1
-            self.save_speaker_db()
-        
-        return best_match_id
+        # 余弦相似度低于阈值则视为新说话人，匹配成功时在线更新质心
+        return self.speaker_index.identify_or_enroll(features, self.speaker_threshold)
+
+    def identify_speakers(self, audio_segments: List[np.ndarray]) -> List[int]:
+        """识别多个音频段的说话人：特征逐段提取，与说话人索引的匹配一次完成"""
+        features = self.extract_voice_features_batch(audio_segments)
+        return self.speaker_index.identify_or_enroll_batch(features, self.speaker_threshold)
 
     def recording_worker(self):
-        """录音线程，持续从麦克风捕获音频"""
-        p = pyaudio.PyAudio()
-        stream = p.open(format=self.audio_format,
-                        channels=self.channels,
-                        rate=self.sample_rate,
-                        input=True,
-                        frames_per_buffer=self.chunk_size)
+        """录音线程，持续从音频输入源读取音频"""
+        source = create_audio_source(self.input_source, self.sample_rate, self.chunk_size)
+        source.open()
+        if not source.realtime:
+            # 回放输入可以等待识别线程，不需要丢弃音频；结果队列改为不限长度，避免长录音丢失较早的识别结果
+            self.audio_queue.policy = "block"
+            with self.result_queue.mutex:
+                self.result_queue.maxsize = 0
         
         print("Recording started...")
         while self.is_running:
             # 读取音频数据
-            data = stream.read(self.chunk_size, exception_on_overflow=False)
-            audio_chunk = np.frombuffer(data, dtype=np.int16)
-            
-            # 检测当前块是否为静音
-            rms = np.sqrt(np.mean(audio_chunk**2))
-            # c:\Users\Ritanlisa\Desktop\DesktopToolAssistant\speechRecognize\wisper.py:121: RuntimeWarning: invalid value encountered in sqrt
-            # rms = np.sqrt(np.mean(audio_chunk**2))
-            db = 20 * np.log10(rms) if rms > 0 else -100
+            audio_chunk = source.read(self.chunk_size)
+            if audio_chunk is None:
+                # 文件/管道输入结束，结束当前句子
+                self.handle_vad_events(self.vad.flush())
+                break
+            self.stats.add_audio(len(audio_chunk))
             
-            if db < self.silence_threshold:
-                self.silence_counter += self.chunk_size / self.sample_rate
-            else:
-                self.silence_counter = 0
+            # 语音活动检测，非语音部分直接丢弃
+            t0 = time.perf_counter()
+            events = self.vad.process(audio_chunk)
+            self.stats.record("vad", time.perf_counter() - t0)
+            self.handle_vad_events(events)
+        
+        # 清理
+        source.close()
+        self.input_finished.set()
+
+    def handle_vad_events(self, events):
+        """根据VAD事件维护当前句子的缓冲区，句子结束时将其放入识别队列"""
+        for event, samples in events:
+            if event == "start":
+                self.audio_buffer.clear()
+                self.audio_buffer.write(samples)
                 self.last_active_time = time.time()
-            
-            # 添加到缓冲区
-            self.audio_buffer = np.append(self.audio_buffer, audio_chunk)
-            
-            # 检测到静音时间超过阈值，分割音频
-            if self.silence_counter >= self.min_silence_duration and len(self.audio_buffer) > 0:
-                # 保留静音前的1秒音频用于平滑
-                keep_samples = int(1 * self.sample_rate)
-                if len(self.audio_buffer) > keep_samples:
-                    segment = self.audio_buffer[:-keep_samples]
-                    self.audio_buffer = self.audio_buffer[-keep_samples:]
-                else:
-                    segment = self.audio_buffer.copy()
-                    self.audio_buffer = np.array([], dtype=np.int16)
-                
+                self.notify_voice_activity()
+            elif event == "audio":
+                # 缓冲区将满时先切出一段，避免覆盖超长句子的开头
+                if len(self.audio_buffer) + len(samples) > self.audio_buffer.capacity:
+                    self.enqueue_segment(self.audio_buffer.pop())
+                self.audio_buffer.write(samples)
+                self.last_active_time = time.time()
+            elif event == "end":
+                segment = self.audio_buffer.pop()
                 # 将音频段放入队列
                 if len(segment) > 0:
-                    self.audio_queue.put(segment)
-                
-                self.silence_counter = 0
-        
-        # 清理
-        stream.stop_stream()
-        stream.close()
-        p.terminate()
+                    self.enqueue_segment(segment)
+                self.utterance_id += 1
 
-    def processing_worker(self):
-        """处理线程，从队列中取出音频进行识别"""
-        while self.is_running or not self.audio_queue.empty():
+    def enqueue_segment(self, segment: np.ndarray):
+        """将音频段连同入队时间放入识别队列"""
+        self.stats.add_segments()
+        self.audio_queue.put((segment, time.perf_counter()))
+
+    def collect_batch(self, timeout: float) -> List[tuple]:
+        """从队列中收集一个批次：等待第一段音频，之后最多再等待 batch_max_wait 秒凑满批次"""
+        try:
+            batch = [self.audio_queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        deadline = time.time() + self.batch_max_wait
+        while len(batch) < self.batch_size:
             try:
-                # 从队列获取音频段
-                audio_segment = self.audio_queue.get(timeout=1.0)
-                
-                # 识别说话人
-                speaker_id = self.identify_speaker(audio_segment)
-                
-                # 使用Whisper进行语音识别
-                audio = audio_segment.astype(np.float32) / 32768.0
-                result = self.whisper_model.transcribe(audio, language="zh")
-                text = result["text"].strip() # type: ignore
-                
+                batch.append(self.audio_queue.get(timeout=max(0.0, deadline - time.time())))
+            except queue.Empty:
+                break
+        return batch
+
+    def emit_batch_results(self, future, speaker_ids: List[int], enqueue_times: List[float], submit_time: float):
+        """按提交顺序输出一个批次的识别结果"""
+        try:
+            texts = future.result()
+            now = time.perf_counter()
+            self.stats.record("transcribe", now - submit_time)
+            for text, speaker_id, enqueued in zip(texts, speaker_ids, enqueue_times):
+                self.stats.record("latency", now - enqueued)
                 if text:
                     # 将结果放入输出队列
-                    self.result_queue.put({
+                    self.stats.add_results()
+                    self.publish_result({
+                        "type": "final",
                         "text": text,
                         "speaker_id": speaker_id,
                         "timestamp": time.time()
                     })
-                
-            except queue.Empty:
+        except BrokenProcessPool as e:
+            self.handle_broken_pool(e)
+        except Exception as e:
+            print(f"Processing error: {e}")
+        finally:
+            for _ in enqueue_times:
+                self.audio_queue.task_done()
+
+    def handle_broken_pool(self, error: Exception):
+        """推理进程池崩溃后无法恢复：停止识别并记录一次错误，而不是对每个批次重复报错"""
+        if not self.is_running:
+            return
+        self.is_running = False
+        log("ERROR", "SpeechRecognition",
+            f"Whisper inference pool is broken ({error}); speech recognition stopped. "
+            "With num_workers > 1 the entry script must guard its startup with `if __name__ == \"__main__\":`.")
+
+    def processing_worker(self):
+        """处理线程，从队列中批量取出音频段，交给推理池识别"""
+        pending = deque()  # 已提交、尚未输出的批次 (future, speaker_ids, 入队时间, 提交时间)
+        while self.is_running or not self.audio_queue.empty() or pending:
+            # 每个推理进程最多再排队一个批次，超出时先等待最早的批次完成
+            if len(pending) > self.inference_pool.num_workers:
+                self.emit_batch_results(*pending.popleft())
+
+            batch = self.collect_batch(timeout=0.05 if pending else 1.0)
+            if batch:
+                segments = [segment for segment, _ in batch]
+                enqueue_times = [enqueued for _, enqueued in batch]
+                t0 = time.perf_counter()
+                for enqueued in enqueue_times:
+                    self.stats.record("queue_wait", t0 - enqueued)
+                try:
+                    # 识别说话人
+                    speaker_ids = self.identify_speakers(segments)
+                    t1 = time.perf_counter()
+                    self.stats.record("speaker_id", t1 - t0)
+                    # 使用Whisper进行批量语音识别
+                    pending.append((self.inference_pool.submit(segments), speaker_ids, enqueue_times, t1))
+                except BrokenProcessPool as e:
+                    self.handle_broken_pool(e)
+                    for _ in batch:
+                        self.audio_queue.task_done()
+                except Exception as e:
+                    print(f"Processing error: {e}")
+                    for _ in batch:
+                        self.audio_queue.task_done()
+
+            while pending and pending[0][0].done():
+                self.emit_batch_results(*pending.popleft())
+
+    def streaming_worker(self):
+        """流式线程，定期重新解码当前句子的滑动窗口并输出部分结果"""
+        tracker = StablePrefixTracker()
+        current_utterance = self.utterance_id
+        decoded_samples = 0
+        last_text = ""
+        min_samples = int(0.3 * self.sample_rate)
+        window_samples = int(self.stream_window * self.sample_rate)
+
+        while self.is_running:
+            time.sleep(self.stream_interval)
+
+            if self.utterance_id != current_utterance:
+                # 上一句已切分并交由处理线程输出最终结果
+                tracker.reset()
+                current_utterance = self.utterance_id
+                decoded_samples = 0
+                last_text = ""
+
+            buffered = len(self.audio_buffer)
+            # 没有新音频或当前不在句子中时跳过解码
+            if buffered < min_samples or buffered == decoded_samples or not self.vad.in_speech:
                 continue
+
+            with self.audio_buffer.lock:
+                window = self.audio_buffer.peek(window_samples, from_end=True).copy()
+            decoded_samples = buffered
+
+            try:
+                hypothesis = self.transcribe_audio(window, temperature=0.0, condition_on_previous_text=False)
             except Exception as e:
-                print(f"Processing error: {e}")
+                print(f"Streaming error: {e}")
+                continue
+
+            if self.utterance_id != current_utterance or not hypothesis or hypothesis == last_text:
+                continue
+            last_text = hypothesis
+            stable, unstable = tracker.update(hypothesis)
+            self.publish_result({
+                "type": "partial",
+                "text": stable + unstable,
+                "stable": stable,
+                "unstable": unstable,
+                "speaker_id": None,
+                "timestamp": time.time()
+            })
+
+    def wait_until_done(self, timeout: Optional[float] = None) -> bool:
+        """等待文件/管道输入读取完毕且所有音频段识别完成（麦克风输入时会一直等待）"""
+        deadline = None if timeout is None else time.time() + timeout
+        if not self.input_finished.wait(timeout):
+            return False
+        with self.audio_queue.all_tasks_done:
+            while self.audio_queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.audio_queue.all_tasks_done.wait(remaining)
+        self.stats.finish()
+        return True
+
+    def get_stats(self) -> dict:
+        """返回实时率、各阶段耗时与吞吐统计"""
+        return self.stats.report()
+
+    def get_queue_stats(self) -> dict:
+        """返回音频队列与结果队列的丢弃/合并次数和最高水位"""
+        return {
+            "audio_queue": self.audio_queue.get_stats(),
+            "result_queue": self.result_queue.get_stats(),
+        }
 
     def start(self):
         """启动语音识别系统"""
@@ -188,6 +352,8 @@ class VoiceRecognitionSystem:
             return
         
         self.is_running = True
+        self.input_finished.clear()
+        self.stats.reset()
         
         # 启动录音线程
         self.recording_thread = threading.Thread(target=self.recording_worker)
@@ -198,6 +364,12 @@ class VoiceRecognitionSystem:
         self.processing_thread = threading.Thread(target=self.processing_worker)
         self.processing_thread.daemon = True
         self.processing_thread.start()
+
+        # 启动流式识别线程
+        if self.streaming:
+            self.streaming_thread = threading.Thread(target=self.streaming_worker)
+            self.streaming_thread.daemon = True
+            self.streaming_thread.start()
         
         print("Voice recognition system started")
 
@@ -210,16 +382,21 @@ class VoiceRecognitionSystem:
         
         if self.processing_thread:
             self.processing_thread.join(timeout=2.0)
+
+        if self.streaming_thread:
+            self.streaming_thread.join(timeout=2.0)
+
+        self.inference_pool.shutdown(wait=False)
         
-        # 处理缓冲区中剩余的音频
-        if len(self.audio_buffer) > int(0.5 * self.sample_rate):
-            speaker_id = self.identify_speaker(self.audio_buffer)
-            audio = self.audio_buffer.astype(np.float32) / 32768.0
-            result = self.whisper_model.transcribe(audio, language="zh")
-            text = result["text"].strip() # type: ignore
+        # 处理缓冲区中剩余的音频（仅当停止时仍在句子中）
+        if self.vad.in_speech and len(self.audio_buffer) > int(0.5 * self.sample_rate):
+            remaining = self.audio_buffer.pop()
+            speaker_id = self.identify_speaker(remaining)
+            text = self.transcribe_audio(remaining)
             
             if text:
-                self.result_queue.put({
+                self.publish_result({
+                    "type": "final",
                     "text": text,
                     "speaker_id": speaker_id,
                     "timestamp": time.time()
@@ -227,53 +404,178 @@ class VoiceRecognitionSystem:
         
         print("Voice recognition system stopped")
 
-    def get_results(self):
-        """从结果队列获取识别结果"""
+    def register_callback(self, callback: Callable[[dict], None]):
+        """注册识别结果回调，每产生一条结果（部分或最终）即在识别线程中调用"""
+        self.result_callbacks.append(callback)
+
+    def unregister_callback(self, callback: Callable[[dict], None]):
+        """注销识别结果回调"""
+        if callback in self.result_callbacks:
+            self.result_callbacks.remove(callback)
+
+    def register_voice_activity_callback(self, callback: Callable[[], None]):
+        """注册语音开始回调，VAD 检测到用户开始说话时在录音线程中调用（例如打断正在播放的语音）"""
+        self.voice_activity_callbacks.append(callback)
+
+    def unregister_voice_activity_callback(self, callback: Callable[[], None]):
+        """注销语音开始回调"""
+        if callback in self.voice_activity_callbacks:
+            self.voice_activity_callbacks.remove(callback)
+
+    def notify_voice_activity(self):
+        """通知所有语音开始回调"""
+        for callback in list(self.voice_activity_callbacks):
+            try:
+                callback()
+            except Exception as e:
+                print(f"Voice activity callback error: {e}")
+
+    def publish_result(self, result: dict):
+        """将识别结果放入结果队列并通知回调"""
+        self.result_queue.put(result)
+        for callback in list(self.result_callbacks):
+            try:
+                callback(result)
+            except Exception as e:
+                print(f"Result callback error: {e}")
+
+    def get_results(self, timeout: Optional[float] = 0):
+        """从结果队列获取识别结果：timeout 为 0 时不等待，为 None 时阻塞直到有新结果"""
         results = []
-        while not self.result_queue.empty():
-            results.append(self.result_queue.get())
+        if timeout is None or timeout > 0:
+            try:
+                results.append(self.result_queue.get(timeout=timeout))
+            except queue.Empty:
+                return results
+        while True:
+            try:
+                results.append(self.result_queue.get_nowait())
+            except queue.Empty:
+                break
         return results
 
 @SpeechRecogType("wisper")
 class wisper_VoiceRec:
-    def __init__(self, type: Literal["wisper"] = "wisper", model_size: str = "base", silence_threshold: int = -40, min_silence_duration: float = 0.5, sample_rate: int = 16000, **kwargs):
+    def __init__(self, type: Literal["wisper"] = "wisper", model_size: str = "base", silence_threshold: int = -40, min_silence_duration: float = 0.5, sample_rate: int = 16000, max_buffer_duration: float = 120.0, speaker_threshold: float = 0.7, speaker_index_file: str = "speaker_db.idx", streaming: bool = False, stream_interval: float = 0.5, stream_window: float = 30.0, batch_size: int = 4, batch_max_wait: float = 0.1, num_workers: int = 1, vad_frame_duration: float = 0.02, vad_noise_margin: float = 10.0, pre_roll: float = 0.3, min_speech_duration: float = 0.15, input_source: Optional[str] = None, audio_queue_size: int = 16, result_queue_size: int = 64, overflow_policy: str = "drop_oldest", result_overflow_policy: str = "drop_oldest", **kwargs):
         # 初始化Whisper模型
         self.whisper_model = VoiceRecognitionSystem(
             model_size=model_size,
-            silence_threshold=silence_threshold,  # 静音阈值 (dB)
-            min_silence_duration=min_silence_duration,  # 最小静音持续时间 (秒)
-            sample_rate=sample_rate  # 采样率 (Hz)
+            silence_threshold=silence_threshold,  # 静音绝对阈值 (dBFS)
+            min_silence_duration=min_silence_duration,  # 句尾拖尾静音时长 (秒)
+            sample_rate=sample_rate,  # 采样率 (Hz)
+            max_buffer_duration=max_buffer_duration,  # 录音缓冲区容量 (秒)
+            speaker_threshold=speaker_threshold,  # 说话人余弦相似度阈值
+            speaker_index_file=speaker_index_file,  # 说话人索引文件
+            streaming=streaming,  # 是否输出流式部分结果
+            stream_interval=stream_interval,  # 流式重新解码间隔 (秒)
+            stream_window=stream_window,  # 流式解码滑动窗口长度 (秒)
+            batch_size=batch_size,  # 每批最多音频段数
+            batch_max_wait=batch_max_wait,  # 凑批最长等待时间 (秒)
+            num_workers=num_workers,  # 推理进程数（大于1时使用多进程CPU推理）
+            vad_frame_duration=vad_frame_duration,  # VAD帧长 (秒)
+            vad_noise_margin=vad_noise_margin,  # 语音需高出噪声底的分贝数
+            pre_roll=pre_roll,  # 句首预录时长 (秒)
+            min_speech_duration=min_speech_duration,  # 判定为语音的最短时长 (秒)
+            input_source=input_source,  # 音频输入源 (None 为麦克风)
+            audio_queue_size=audio_queue_size,  # 待识别音频段队列容量
+            result_queue_size=result_queue_size,  # 识别结果队列容量
+            overflow_policy=overflow_policy,  # 音频队列溢出策略: drop_oldest / drop_newest / merge / block
+            result_overflow_policy=result_overflow_policy  # 结果队列溢出策略
         )
         self.whisper_model.start()
 
-    def transcribe(self):
-        # 使用Whisper进行转录
-        result = self.whisper_model.get_results()
-        return result
+    def transcribe(self, timeout: Optional[float] = None) -> List[dict]:
+        """获取识别结果：阻塞直到有新结果或超时（timeout=0 时立即返回）"""
+        return self.whisper_model.get_results(timeout=timeout)
+
+    def register_callback(self, callback: Callable[[dict], None]):
+        """注册识别结果回调（在识别线程中调用）"""
+        self.whisper_model.register_callback(callback)
+
+    def unregister_callback(self, callback: Callable[[dict], None]):
+        """注销识别结果回调"""
+        self.whisper_model.unregister_callback(callback)
+
+    def register_voice_activity_callback(self, callback: Callable[[], None]):
+        """注册语音开始回调（在录音线程中调用）"""
+        self.whisper_model.register_voice_activity_callback(callback)
+
+    def unregister_voice_activity_callback(self, callback: Callable[[], None]):
+        """注销语音开始回调"""
+        self.whisper_model.unregister_voice_activity_callback(callback)
+
+    async def stream_results(self) -> AsyncIterator[dict]:
+        """异步迭代识别结果：async for result in speech_recog"""
+        loop = asyncio.get_running_loop()
+        results: asyncio.Queue = asyncio.Queue()
+
+        def forward(result: dict):
+            loop.call_soon_threadsafe(results.put_nowait, result)
+
+        self.register_callback(forward)
+        try:
+            while True:
+                yield await results.get()
+        finally:
+            self.unregister_callback(forward)
+
+    def __aiter__(self) -> AsyncIterator[dict]:
+        return self.stream_results()
+
+    def get_queue_stats(self) -> dict:
+        """队列丢弃/合并计数与最高水位"""
+        return self.whisper_model.get_queue_stats()
 
 # 使用示例
+# 麦克风:   python -m speechRecognize.wisper
+# 文件回放: python -m speechRecognize.wisper --input recording.wav（或目录、pipe:/path/to/fifo、- 表示标准输入）
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Whisper voice recognition demo / replay benchmark")
+    parser.add_argument("--input", default=None, help="WAV file, directory of WAV files, raw PCM file, pipe:<path> or - (default: microphone)")
+    parser.add_argument("--model-size", default="base")
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--num-workers", type=int, default=1)
+    args = parser.parse_args()
+
     # 初始化语音识别系统
     recognizer = VoiceRecognitionSystem(
-        model_size="base",
-        silence_threshold=-40,  # 静音阈值 (dB)
-        min_silence_duration=0.5  # 最小静音持续时间 (秒)
+        model_size=args.model_size,
+        silence_threshold=-40,  # 静音绝对阈值 (dBFS)
+        min_silence_duration=0.5,  # 最小静音持续时间 (秒)
+        batch_size=args.batch_size,
+        num_workers=args.num_workers,
+        input_source=args.input
     )
     
     # 启动系统
     recognizer.start()
     
     try:
-        # 主循环 - 在实际应用中，这里可以是你程序的主逻辑
-        while True:
-            # 获取并处理识别结果
-            results = recognizer.get_results()
-            for result in results:
-                print(f"Speaker {result['speaker_id']}: {result['text']}")
-            
-            time.sleep(1)
+        if args.input is not None:
+            # 回放模式：以CPU允许的最快速度处理输入，识别结果在处理过程中通过回调输出，结束后输出统计
+            def print_result(result: dict):
+                if result["type"] == "final":
+                    print(f"Speaker {result['speaker_id']}: {result['text']}")
+
+            recognizer.register_callback(print_result)
+            recognizer.wait_until_done()
+            print(recognizer.stats.format_report())
+            print(recognizer.get_queue_stats())
+            recognizer.stop()
+        else:
+            # 主循环 - 在实际应用中，这里可以是你程序的主逻辑
+            while True:
+                # 获取并处理识别结果
+                results = recognizer.get_results()
+                for result in results:
+                    if result["type"] == "final":
+                        print(f"Speaker {result['speaker_id']}: {result['text']}")
+                
+                time.sleep(1)
     
     except KeyboardInterrupt:
         # 用户按下Ctrl+C时停止
         recognizer.stop()
-        print("Program stopped by user")
\ No newline at end of file
+        print("Program stopped by user")